@@ -0,0 +1,334 @@
+import re
+import sys
+import time
+from functools import lru_cache
+
+# --- STAŁE: Ocena odpowiedzi ---
+RATIO_THRESHOLD = 80  # dawny próg fuzz.ratio (ostatni etap)
+TOKEN_SET_THRESHOLD = 90
+TOKEN_SET_MIN_LENGTH_RATIO = 0.75  # krótsza z odpowiedzi musi mieć >= 75% długości dłuższej
+SURNAME_THRESHOLD = 85  # literówki w samym nazwisku ("Slowacky")
+SURNAME_MIN_LENGTH = 4  # krótsze "nazwiska" to zwykle końcówki tytułów ("Tax", "Man")
+NAME_SUFFIXES = frozenset({"jr", "sr"})  # "Martin Luther King Jr." - nazwisko to King
+MISSING_PREFIX_MIN_LENGTH = 2  # "Sublimacja" to nie literówka w "Resublimacja"
+# Pierwsze słowo nazw geograficznych i instytucji - "Biebrzański Park Narodowy" to nie osoba
+NAME_HEAD_NOUNS = frozenset({
+    "park", "morze", "ocean", "jezioro", "rzeka", "gora", "gory", "szczyt", "wyspa", "wyspy",
+    "polwysep", "puszcza", "wodospad", "row", "zatoka", "pustynia", "stany", "uniwersytet",
+    "akademia", "klub", "zespol", "orkiestra", "most", "zamek", "palac", "plac", "program",
+})
+# Słowa, bez których odpowiedź nadal jest pełna ("3500 p.n.e." dla "Około 3500 p.n.e.")
+QUALIFIER_WORDS = frozenset({"okolo", "ok", "ponad", "prawie"})
+MATCHER_CACHE_SIZE = 4096
+
+_PARENTHESES = re.compile(r"\s*\(([^)]*)\)")
+_NON_WORD = re.compile(r"[^\w\s]")
+_NUMBER = re.compile(r"\d+")
+# Liczebniki rzymskie pisane wielkimi literami ("Przemysł II") - małe "i" to spójnik
+_ROMAN = re.compile(r"\b(?=[MDCLXVI]+\b)M{0,3}(?:C[MD]|D?C{0,3})(?:X[CL]|L?X{0,3})(?:I[XV]|V?I{0,3})\b(?<=[MDCLXVI])")
+_INNER_CAPITAL = re.compile(r"\w[A-ZĄĆĘŁŃÓŚŹŻ]")
+# Pytania o osobę: "Kto napisał...?" albo rzeczownik osobowy na początku pytania
+# ("Który polski poeta...", "Jak nazywa się polski aktor, który...")
+_PERSON_QUESTION_START = re.compile(r"^\W*(kto|kogo|komu|kim|czyj\w*)\b", re.IGNORECASE)
+_PERSON_NOUN = re.compile(
+    r"\b(autor|pisar|poet|kompozytor|malar|rzeźbiar|reżyser(?!i)|aktor|piosenkar|wokalist|raper|muzyk"
+    r"|gitarzyst|pianist|dyrygent|śpiewa|twórc|król|królow|cesarz|władc|prezydent|premier|papie|polityk"
+    r"|generał|wódz|hetman|dowódc|naukow|odkryw|wynalaz|filozof|fizyk|chemik|matematyk|lekar|architekt"
+    r"|podróżni|kosmonaut|astronaut|himalaist|sportow(?:iec|c)|skocz|tenisist|piłkarz|pływa(?:k|cz)"
+    r"|kolarz|bokser|zawodni|trener|influencer|youtuber|dziennikar|bohater|postać|postaci|imię|nazwisk)",
+    re.IGNORECASE,
+)
+PERSON_NOUN_WINDOW = 6  # rzeczownik osobowy musi być wśród pierwszych słów pytania
+
+
+_DIACRITICS = (
+    ('ó', 'o'), ('ł', 'l'), ('ż', 'z'), ('ź', 'z'), ('ć', 'c'),
+    ('ń', 'n'), ('ś', 's'), ('ą', 'a'), ('ę', 'e'), ('ü', 'u'),
+)
+
+
+_fuzz = None
+
+
+def load_fuzz():
+    """
+    Moduł rapidfuzz.fuzz (silnik thefuzz) importowany przy pierwszym użyciu
+    (import to kilkanaście ms na PC i dużo więcej na telefonie - nie opóźnia
+    startu). Wołamy go bezpośrednio: opakowanie thefuzz podwaja czas
+    pojedynczego fuzz.ratio, a wynik zaokrąglamy tak jak ono.
+    """
+    global _fuzz
+    if _fuzz is None:
+        # Wymagana biblioteka do "fuzzy matching"
+        from rapidfuzz import fuzz
+        _fuzz = fuzz
+    return _fuzz
+
+
+def fold_polish(text: str) -> str:
+    """Małe litery bez polskich znaków (tekst ASCII nie jest w ogóle przeglądany)."""
+    text = str(text).lower()
+    if not text.isascii():
+        for char, replacement in _DIACRITICS:
+            if char in text:
+                text = text.replace(char, replacement)
+    return text
+
+
+def normalize_answer(text: str) -> str:
+    """
+    Normalizuje odpowiedź.
+    """
+    return _squash(fold_polish(text))
+
+
+def _squash(folded: str) -> str:
+    # Dawne zasady normalize_answer: 'u' -> 'o' i bez żadnych białych znaków
+    return "".join(folded.replace('u', 'o').split())
+
+
+def tokenize(text: str) -> list:
+    """Słowa bez polskich znaków i interpunkcji: "Słowacki, Juliusz" -> ["slowacki", "juliusz"]."""
+    return _NON_WORD.sub(" ", fold_polish(text)).split()
+
+
+def answer_numbers(text: str, normalized: str) -> list:
+    """Liczby (z odpowiedzi po normalize_answer) i liczebniki rzymskie, które muszą się zgadzać."""
+    # Szybkie ścieżki: większość odpowiedzi nie ma cyfr, a wpisana małymi literami - liczebników
+    numbers = [] if normalized.isalpha() else _NUMBER.findall(normalized)
+    if not text.islower():
+        numbers += _ROMAN.findall(text)
+    return numbers
+
+
+def is_person_question(question: str) -> bool:
+    """Czy pytanie pyta o osobę (postać) - tylko wtedy samo nazwisko jest pełną odpowiedzią."""
+    if _PERSON_QUESTION_START.search(question):
+        return True
+    head = " ".join(question.split(",", 1)[0].split()[:PERSON_NOUN_WINDOW])
+    return bool(_PERSON_NOUN.search(head))
+
+
+def answer_variants(correct: str) -> list:
+    """
+    Akceptowane warianty poprawnej odpowiedzi: pełna, bez dopisku w nawiasie
+    oraz alternatywy rozdzielone "lub" ("Biały lub Czarny", "Niebieski (lub cyjan)").
+    """
+    variants = [correct]
+    main = _PARENTHESES.sub("", correct).strip()
+    if main and main != correct:
+        variants.append(main)
+    for note in _PARENTHESES.findall(correct):
+        note = note.strip()
+        if note.lower().startswith("lub "):
+            variants.append(note[4:].strip())
+    if " lub " in main:
+        variants.extend(part.strip() for part in main.split(" lub ") if part.strip())
+    return variants
+
+
+class AnswerMatcher:
+    """
+    Ocena odpowiedzi gracza dla jednego pytania. Wszystko, co zależy tylko
+    od poprawnej odpowiedzi, jest liczone raz w konstruktorze, a etapy
+    (od najtańszego) kończą ocenę przy pierwszej akceptacji:
+
+    1. "exact"     - identyczna po normalize_answer (także wariant z answer_variants),
+    2. "surname"   - dla pytań o osobę: podzbiór słów z nazwiskiem / samo nazwisko z literówką,
+    3. "token_set" - fuzz.token_set_ratio (dowolna kolejność słów),
+    4. "ratio"     - dawny fuzz.ratio po normalize_answer.
+
+    Etapy 3 i 4 wymagają tych samych liczb (także rzymskich) w odpowiedzi
+    gracza i w wariancie. Etap 2 działa tylko z treścią pytania o osobę
+    (is_person_question) - "Narodowy" to nie odpowiedź na pytanie o park.
+    """
+
+    def __init__(self, correct: str, question: str = ""):
+        self.correct = correct
+        variants = answer_variants(correct)
+        self.normalized = [normalize_answer(v) for v in variants]
+        self.normalized_set = frozenset(self.normalized)
+        self.folded = [" ".join(tokenize(v)) for v in variants]
+        self.numbers = [answer_numbers(v, n) for v, n in zip(variants, self.normalized)]
+
+        # Imię i nazwisko: pytanie o osobę i co najmniej dwa słowa wielką literą
+        # ("Juliusz Słowacki"), z których pierwsze nie jest rzeczownikiem pospolitym
+        # ("Park", "Morze"). Liczebnik i "Jr." nie są nazwiskiem, więc "Mieszko I"
+        # to jedno słowo, podobnie jak tytuły z łącznikiem ("Spider-Man"); człon
+        # nazwiska z łącznikiem ("Skłodowska-Curie") musi mieć SURNAME_MIN_LENGTH liter.
+        # Pomijamy wielką literę w środku słowa ("HyperText").
+        main = _PARENTHESES.sub("", correct).strip() or correct
+        words = main.replace(".", " ").split()
+        name_words = [w for w in words if not _ROMAN.fullmatch(w) and w.lower() not in NAME_SUFFIXES]
+        surnames = frozenset(
+            part for part in tokenize(name_words[-1]) if len(part) >= SURNAME_MIN_LENGTH
+        ) if name_words else frozenset()
+        self.proper_name = (
+            len(name_words) >= 2
+            and all(w[:1].isupper() and w.replace("-", "").isalpha() for w in name_words)
+            and not any(_INNER_CAPITAL.search(part) for w in name_words for part in w.split("-"))
+            and bool(surnames)
+            and fold_polish(name_words[0]) not in NAME_HEAD_NOUNS
+            and is_person_question(question)
+        )
+        self.surnames = surnames if self.proper_name else frozenset()
+        self.name_tokens = frozenset(tokenize(" ".join(words))) if self.proper_name else frozenset()
+        # Słowa wariantu, które gracz musi podać, by etap 4 przyjął odpowiedź bez dopisków
+        self.words = [frozenset(f.split()) for f in self.folded]
+        self.core_words = [w - QUALIFIER_WORDS for w in self.words]
+
+    def match(self, user_input: str) -> tuple:
+        """Zwraca (czy_poprawna, podobieństwo_w_%, nazwa_etapu)."""
+        folded_user = fold_polish(user_input)
+        norm_user = _squash(folded_user)
+        if not norm_user:
+            return False, 0, "empty"
+
+        # 1. Dokładne dopasowanie
+        if norm_user in self.normalized_set:
+            return True, 100, "exact"
+
+        # Bez interpunkcji (najczęściej) wystarczy split()
+        if folded_user.replace(" ", "").isalnum():
+            user_tokens = folded_user.split()
+        else:
+            user_tokens = _NON_WORD.sub(" ", folded_user).split()
+        # Etapy rozmyte (3, 4) przyjmują tylko odpowiedź z tymi samymi liczbami:
+        # "0.5" to nie "0.25", a "100" to nie "1000", choć podobieństwo > 80%
+        user_numbers = answer_numbers(user_input, norm_user)
+        fuzz = _fuzz or load_fuzz()
+
+        # 2. Nazwisko / podzbiór słów nazwy własnej
+        if self.proper_name and user_tokens:
+            if not self.surnames.isdisjoint(user_tokens) and self.name_tokens.issuperset(user_tokens):
+                return True, 100, "surname"
+            if len(user_tokens) == 1:
+                score = round(max(fuzz.ratio(user_tokens[0], surname) for surname in self.surnames))
+                if score >= SURNAME_THRESHOLD:
+                    return True, score, "surname"
+
+        # 3. Zbiór słów niezależnie od kolejności - token_set_ratio daje 100 także
+        #    dla podzbioru słów, więc porównujemy tylko odpowiedzi podobnej długości
+        #    ("Tenis stołowy" nie przechodzi dla "Tenis").
+        #    Dla jednego słowa gracza etap 4 ocenia to samo, więc go pomijamy.
+        if len(user_tokens) > 1:
+            joined_user = " ".join(user_tokens)
+            for folded, numbers in zip(self.folded, self.numbers):
+                if numbers != user_numbers:
+                    continue
+                shorter, longer = sorted((len(joined_user), len(folded)))
+                if shorter < TOKEN_SET_MIN_LENGTH_RATIO * longer:
+                    continue
+                # Obie strony są już po tokenize - bez ponownego przetwarzania
+                score = round(fuzz.token_set_ratio(joined_user, folded))
+                if score >= TOKEN_SET_THRESHOLD:
+                    return True, score, "token_set"
+
+        # 4. Dawny próg fuzz.ratio - bez brakującego lub dopisanego przedrostka
+        #    ("Sublimacja" dla "Resublimacja"), który zmienia znaczenie słowa, i bez
+        #    pominiętych całych słów ("sportowy" dla "Chód sportowy")
+        best = 0
+        joined_user = " ".join(user_tokens)
+        for normalized, folded, numbers, words, core_words in zip(
+                self.normalized, self.folded, self.numbers, self.words, self.core_words):
+            score = round(fuzz.ratio(norm_user, normalized))
+            best = max(best, score)
+            if (score >= RATIO_THRESHOLD and numbers == user_numbers
+                    and not _differs_by_prefix(joined_user, folded)
+                    and not (words.issuperset(user_tokens) and not core_words.issubset(user_tokens))):
+                return True, score, "ratio"
+        return False, best, "ratio"
+
+
+def _differs_by_prefix(a: str, b: str) -> bool:
+    """Czy dłuższa odpowiedź to krótsza z przedrostkiem doklejonym do pierwszego słowa."""
+    shorter, longer = sorted((a, b), key=len)
+    extra = len(longer) - len(shorter)
+    return extra >= MISSING_PREFIX_MIN_LENGTH and longer.endswith(shorter) and longer[extra - 1] != " "
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def get_matcher(correct: str, question: str = "") -> AnswerMatcher:
+    """Wspólny (dla wszystkich sesji) matcher poprawnej odpowiedzi."""
+    return AnswerMatcher(correct, question)
+
+
+def _legacy_normalize(text: str) -> str:
+    # Dawna implementacja normalize_answer (punkt odniesienia dla pomiaru czasu)
+    text = str(text).lower().strip()
+    for char, replacement in _DIACRITICS:
+        text = text.replace(char, replacement)
+    text = text.replace('u', 'o')
+    return "".join(text.split())
+
+
+def legacy_match(user_input: str, correct: str, fuzz) -> tuple:
+    """Dawna ocena: jeden thefuzz.fuzz.ratio po normalizacji obu odpowiedzi przy każdej ocenie."""
+    score = fuzz.ratio(_legacy_normalize(user_input), _legacy_normalize(correct))
+    return score >= RATIO_THRESHOLD, score, "ratio"
+
+
+def evaluate_corpus(path: str, repeat: int = 200, rounds: int = 5) -> dict:
+    """
+    Mierzy trafność i czas oceny na oznaczonym korpusie TSV
+    (poprawna_odpowiedź, odpowiedź_gracza, 1/0[, pytanie]) - dla dawnej oceny
+    i nowego potoku. Obie oceny są mierzone na przemian dla każdej próbki,
+    a czas próbki to najlepsza z `rounds` średnich z `repeat` ocen - zmiany
+    obciążenia maszyny nie faworyzują żadnej z nich. Podajemy medianę i sumę.
+    """
+    import csv
+    import statistics
+
+    from thefuzz import fuzz as legacy_fuzz
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = [row for row in csv.reader(f, delimiter="\t") if row and not row[0].startswith("#")]
+    samples = [(row[0], row[1], row[2] == "1", row[3] if len(row) > 3 else "") for row in rows]
+
+    graders = {
+        "legacy": lambda user, correct, question: legacy_match(user, correct, legacy_fuzz),
+        "pipeline": lambda user, correct, question: get_matcher(correct, question).match(user),
+    }
+    # Matchery są budowane przy wyświetleniu pytania, więc nie wliczamy ich do czasu oceny
+    for correct, _, _, question in samples:
+        get_matcher(correct, question)
+
+    results = {name: {"correct": 0, "errors": [], "timings": []} for name in graders}
+    for correct, user, expected, question in samples:
+        for name, grade in graders.items():
+            if grade(user, correct, question)[0] == expected:
+                results[name]["correct"] += 1
+            else:
+                results[name]["errors"].append((correct, user, expected))
+
+        best = dict.fromkeys(graders, float("inf"))
+        for _ in range(rounds):
+            for name, grade in graders.items():
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    grade(user, correct, question)
+                best[name] = min(best[name], (time.perf_counter() - started) / repeat)
+        for name in graders:
+            results[name]["timings"].append(best[name])
+
+    report = {"samples": len(samples)}
+    for name, result in results.items():
+        report[name] = {
+            "accuracy": result["correct"] / len(samples),
+            "median_us": statistics.median(result["timings"]) * 1e6,
+            "total_us": sum(result["timings"]) * 1e6,
+            "errors": result["errors"],
+        }
+    return report
+
+
+if __name__ == "__main__":
+    # Pomiar na korpusie: python answer_matching.py [answer_corpus.tsv]
+    report = evaluate_corpus(sys.argv[1] if len(sys.argv) > 1 else "answer_corpus.tsv")
+    print(f"Próbek: {report['samples']}")
+    for name in ("legacy", "pipeline"):
+        result = report[name]
+        print(f"{name:9s} trafność {result['accuracy']:.1%}, mediana {result['median_us']:.2f} us, "
+              f"korpus {result['total_us']:.0f} us")
+        for correct, user, expected in result["errors"]:
+            print(f"    {'powinno przejść' if expected else 'nie powinno przejść'}: {user!r} dla {correct!r}")
@@ -0,0 +1,365 @@
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from manifest import MANIFEST_FILE, MANIFEST_VERSION, SET_COUNT, build_manifest, parse_manifest
+from question_sources import parse_text_questions
+
+# --- STAŁE: Aktualizacje zestawów ---
+CONTENT_URL_ENV = "AWANTURA_CONTENT_URL"  # adres serwera treści (nadpisuje content_url z manifestu)
+CONTENT_CACHE_DIR = "content_cache"
+CONTENT_POOL_SIZE = 4  # liczba stałych połączeń (i równoległych pobrań)
+CONTENT_TIMEOUT = 10.0  # sekundy
+CONTENT_CHECK_INTERVAL = 15 * 60  # sekundy - częstsze sprawdzenia (np. kolejne sesje web) są pomijane
+SET_NAMES = frozenset(f"{index:02d}" for index in range(1, SET_COUNT + 1))  # zestawy z APK: "01".."50"
+
+
+def default_cache_dir() -> str:
+    """Katalog pobranych zestawów w katalogu danych aplikacji (APK/desktop) lub w katalogu bieżącym."""
+    return os.path.join(os.getenv("FLET_APP_STORAGE_DATA", "."), CONTENT_CACHE_DIR)
+
+
+def is_valid_entry(entry: dict) -> bool:
+    """
+    Czy wpis manifestu serwera opisuje jeden z zestawów aplikacji ("07" -> "07.txt").
+    Nazwa pliku z serwera trafia do ścieżki w pamięci, więc "../x" nie może przejść.
+    """
+    set_name = entry.get("set")
+    return set_name in SET_NAMES and entry.get("file") == f"{set_name}.txt"
+
+
+def write_atomic(path: str, data: bytes):
+    """Zapis przez plik tymczasowy i os.replace - czytający widzi stary albo nowy plik, nigdy połowę."""
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ContentCache:
+    """
+    Lokalna kopia zaktualizowanych zestawów: pliki NN.txt i manifest.json
+    z wpisami (sha256, liczba pytań) tylko dla pobranych zestawów.
+    Plik trafia tu wyłącznie po weryfikacji, więc można go czytać bez sprawdzania.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or default_cache_dir()
+        self._lock = threading.Lock()
+
+    def entries(self) -> dict:
+        try:
+            with open(os.path.join(self.path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+                return parse_manifest(f.read()) or {}
+        except OSError:
+            return {}
+
+    def read_text(self, filename: str) -> str | None:
+        try:
+            with open(os.path.join(self.path, filename), "r", encoding="utf-8-sig") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, entry: dict, data: bytes):
+        if not is_valid_entry(entry):
+            raise ValueError(f"nieprawidłowy wpis zestawu: {entry!r}")
+        os.makedirs(self.path, exist_ok=True)
+        write_atomic(os.path.join(self.path, entry["file"]), data)
+        self._update_entries(add=[entry])
+
+    def drop(self, entries: list):
+        """Usuwa zestawy z pamięci (np. serwer wrócił do wersji z APK)."""
+        self._update_entries(remove=[entry["set"] for entry in entries])
+        for entry in entries:
+            try:
+                os.remove(os.path.join(self.path, entry["file"]))
+            except OSError:
+                pass
+
+    def _update_entries(self, add=(), remove=()):
+        with self._lock:
+            entries = self.entries()
+            for entry in add:
+                entries[entry["set"]] = entry
+            for set_name in remove:
+                entries.pop(set_name, None)
+            manifest = {"version": MANIFEST_VERSION, "sets": [entries[name] for name in sorted(entries)]}
+            os.makedirs(self.path, exist_ok=True)
+            write_atomic(os.path.join(self.path, MANIFEST_FILE),
+                         json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+
+
+class ConnectionPool:
+    """Stałe połączenia HTTP/1.1 (keep-alive) do jednego serwera, współdzielone przez wątki pobierające."""
+
+    def __init__(self, base_url: str, size: int = CONTENT_POOL_SIZE, timeout: float = CONTENT_TIMEOUT):
+        url = urlsplit(base_url)
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle = queue.LifoQueue()
+        self._size = size
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        with self._lock:
+            self.connections_opened += 1
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def get(self, path: str) -> tuple:
+        """GET z gzip. Zwraca (status, treść po rozpakowaniu, liczba bajtów przesłanych)."""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            status, body, encoding = self._request(connection, path)
+        except (OSError, http.client.HTTPException):
+            # Serwer mógł zamknąć bezczynne połączenie - jedna próba na nowym
+            connection.close()
+            connection = self._connect()
+            status, body, encoding = self._request(connection, path)
+        if self._idle.qsize() < self._size:
+            self._idle.put(connection)
+        else:
+            connection.close()
+        data = gzip.decompress(body) if encoding == "gzip" else body
+        return status, data, len(body)
+
+    def _request(self, connection, path: str) -> tuple:
+        connection.request("GET", f"{self.prefix}{path}", headers={"Accept-Encoding": "gzip"})
+        response = connection.getresponse()
+        body = response.read()
+        return response.status, body, response.getheader("Content-Encoding", "")
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class ContentUpdater:
+    """
+    Aktualizacja zestawów "po różnicy": pobiera manifest serwera, porównuje
+    sha256 każdego zestawu z wersją lokalną (pamięć aktualizacji, a w drugiej
+    kolejności manifest z APK) i pobiera tylko zmienione pliki - skompresowane,
+    równolegle po stałych połączeniach. Każdy plik jest weryfikowany (sha256
+    i liczba pytań) przed podmianą w ContentCache.
+    """
+
+    def __init__(self, base_url: str, cache: ContentCache | None = None, pool_size: int = CONTENT_POOL_SIZE):
+        self.base_url = base_url
+        self.cache = cache or ContentCache()
+        self.pool_size = pool_size
+        self.last_checked = None
+        self._lock = threading.Lock()
+
+    def plan(self, server_sets: dict, bundled: dict | None) -> tuple:
+        """Zwraca (do_pobrania, do_usunięcia_z_pamięci) na podstawie sum sha256."""
+        cached = self.cache.entries()
+        to_download = []
+        to_drop = []
+        for set_name, entry in sorted(server_sets.items(), key=lambda item: str(item[0])):
+            if not entry.get("sha256"):
+                continue
+            if not is_valid_entry(entry):
+                print(f"Aktualizacja: pominięto nieprawidłowy wpis manifestu: {entry!r}")
+                continue
+            bundled_entry = (bundled or {}).get(set_name)
+            bundled_sha = bundled_entry.get("sha256") if bundled_entry else None
+            cached_entry = cached.get(set_name)
+            if entry["sha256"] == bundled_sha:
+                if cached_entry:
+                    to_drop.append(cached_entry)
+            elif not cached_entry or cached_entry.get("sha256") != entry["sha256"]:
+                to_download.append(entry)
+        return to_download, to_drop
+
+    def update(self, bundled: dict | None, force: bool = False) -> dict:
+        """
+        Jedna aktualizacja (kolejne wywołania w tym czasie i przez CONTENT_CHECK_INTERVAL
+        po niej nic nie robią, chyba że force=True). Zwraca raport z listą
+        zmienionych zestawów ("changed") i statystykami.
+        """
+        if not self._lock.acquire(blocking=False):
+            return {"changed": [], "skipped": True}
+        if not force and self.last_checked is not None \
+                and time.monotonic() - self.last_checked < CONTENT_CHECK_INTERVAL:
+            self._lock.release()
+            return {"changed": [], "skipped": True}
+        self.last_checked = time.monotonic()
+        started = time.perf_counter()
+        pool = ConnectionPool(self.base_url, self.pool_size)
+        try:
+            status, data, _ = pool.get(f"/{MANIFEST_FILE}")
+            server_sets = parse_manifest(data.decode("utf-8")) if status == 200 else None
+            if server_sets is None:
+                raise ValueError(f"nieprawidłowy manifest serwera (HTTP {status})")
+
+            to_download, to_drop = self.plan(server_sets, bundled)
+            if to_drop:
+                self.cache.drop(to_drop)
+
+            changed = [entry["set"] for entry in to_drop]
+            failed = []
+            transferred = 0
+            with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+                for entry, result in zip(to_download, executor.map(lambda e: self._download(pool, e), to_download)):
+                    error, size = result
+                    transferred += size
+                    if error:
+                        failed.append(entry["set"])
+                        print(f"Aktualizacja: zestaw {entry['set']} odrzucony. Błąd: {error}")
+                    else:
+                        changed.append(entry["set"])
+        finally:
+            pool.close()
+            self._lock.release()
+
+        return {
+            "changed": sorted(changed),
+            "failed": failed,
+            "checked": len(server_sets),
+            "bytes": transferred,
+            "connections": pool.connections_opened,
+            "seconds": time.perf_counter() - started,
+        }
+
+    def _download(self, pool: ConnectionPool, entry: dict) -> tuple:
+        """Pobiera, weryfikuje i podmienia jeden zestaw. Zwraca (błąd albo None, bajty przesłane)."""
+        try:
+            status, data, size = pool.get(f"/sets/{entry['file']}")
+        except Exception as e:
+            return e, 0
+        if status != 200:
+            return f"HTTP {status}", size
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            return "niezgodna suma sha256", size
+        try:
+            questions = len(parse_text_questions(data.decode("utf-8-sig")))
+        except UnicodeDecodeError as e:
+            return e, size
+        if questions != entry["questions"]:
+            return f"{questions} pytań zamiast {entry['questions']}", size
+        self.cache.store(entry, data)
+        return None, size
+
+
+_cache = None
+_updater = None
+_updater_lock = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """Wspólna pamięć pobranych zestawów dla całego procesu."""
+    global _cache
+    with _updater_lock:
+        if _cache is None:
+            _cache = ContentCache()
+        return _cache
+
+
+def get_content_updater(bundled_url: str | None = None) -> ContentUpdater | None:
+    """
+    Wspólny aktualizator dla procesu. Adres serwera: AWANTURA_CONTENT_URL
+    (nadpisanie, np. lokalny serwer; pusta wartość wyłącza aktualizacje),
+    a bez niej `bundled_url` z manifestu w assets. None - brak adresu.
+    """
+    global _updater
+    url = os.environ.get(CONTENT_URL_ENV, bundled_url)
+    if not url:
+        return None
+    cache = get_content_cache()
+    with _updater_lock:
+        if _updater is None:
+            _updater = ContentUpdater(url, cache)
+        return _updater
+
+
+# --- Lokalny serwer treści (zastępuje zdalny serwer podczas testów) ---
+
+def make_handler(assets_dir: str):
+    # Serwer potrzebny tylko do testów - nie importujemy go przy starcie aplikacji
+    from http.server import BaseHTTPRequestHandler
+
+    class ContentRequestHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 - połączenia zostają otwarte dla kolejnych żądań
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            # Manifest liczony przy każdym żądaniu - zmiana pliku zestawu od razu jest "nową wersją"
+            if self.path == f"/{MANIFEST_FILE}":
+                manifest = build_manifest(assets_dir)
+                self._send(json.dumps(manifest, ensure_ascii=False).encode("utf-8"), "application/json")
+                return
+            name = self.path[len("/sets/"):] if self.path.startswith("/sets/") else ""
+            path = os.path.join(assets_dir, name)
+            if os.path.basename(name) != name or not name.endswith(".txt") or not os.path.isfile(path):
+                self.send_error(404)
+                return
+            with open(path, "rb") as f:
+                self._send(f.read(), "text/plain; charset=utf-8")
+
+        def _send(self, body: bytes, content_type: str):
+            gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+            if gzipped:
+                body = gzip.compress(body, mtime=0)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ContentRequestHandler
+
+
+def serve_local(assets_dir: str = "assets", host: str = "127.0.0.1", port: int = 0):
+    """
+    Uruchamia w tle lokalny serwer treści z plikami zestawów z `assets_dir`.
+    Zwraca (serwer, adres_bazowy); port 0 oznacza dowolny wolny port.
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), make_handler(assets_dir))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    # Lokalny serwer treści:  python content_updates.py serve [katalog_z_zestawami]
+    #   -> AWANTURA_CONTENT_URL=http://127.0.0.1:8766
+    # Jednorazowa aktualizacja: python content_updates.py update URL [katalog_pamięci]
+    if len(sys.argv) > 2 and sys.argv[1] == "update":
+        updater = ContentUpdater(sys.argv[2], ContentCache(sys.argv[3] if len(sys.argv) > 3 else None))
+        with open(os.path.join("assets", MANIFEST_FILE), "r", encoding="utf-8") as f:
+            report = updater.update(parse_manifest(f.read()))
+        print(f"Aktualizacja: sprawdzono {report['checked']}, zmienione: {report['changed'] or 'brak'}, "
+              f"odrzucone: {report['failed'] or 'brak'}, pobrano {report['bytes']} B "
+              f"przez {report['connections']} połączeń w {report['seconds'] * 1000:.0f} ms")
+    else:
+        server, url = serve_local(sys.argv[2] if len(sys.argv) > 2 else "assets", port=8766)
+        print(f"Aktualizacja: lokalny serwer treści działa pod {url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
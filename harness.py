@@ -0,0 +1,377 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import flet as ft
+
+# --- STAŁE: Sesje bez interfejsu (harness) ---
+HARNESS_SESSIONS = 200
+HARNESS_SEED = 2024
+HARNESS_SETS = ("01", "17", "35", "48")
+START_MONEY = 10000  # kasa na start (jak w reset_game_state)
+MAX_BIDS_PER_ROUND = 12
+ABCD_RATE = 0.35  # jak często bot kupuje opcje ABCD
+HINT_RATE = 0.5  # jak często po ABCD dokupuje 50/50
+ACCURACY = 0.75  # jak często bot odpowiada poprawnie
+WRONG_ANSWER = "xqzxqz"  # odpowiedź, której nie zaakceptuje żaden etap oceny
+MAX_STEPS_PER_SESSION = 2000  # zabezpieczenie przed zapętlonym scenariuszem
+
+
+class HarnessError(AssertionError):
+    """Naruszenie niezmiennika gry w sesji bez interfejsu."""
+
+
+class FakeSessionStorage:
+    """Odpowiednik page.session (pamięć sesji w procesie)."""
+
+    def __init__(self):
+        self._store = {}
+
+    def set(self, key: str, value):
+        self._store[key] = value
+
+    def get(self, key: str):
+        return self._store.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        return key in self._store
+
+    def remove(self, key: str):
+        self._store.pop(key)
+
+
+class FakeClientStorage:
+    """Odpowiednik page.client_storage trzymający wartości w słowniku."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key: str):
+        return self.data.get(key)
+
+    async def set_async(self, key: str, value) -> bool:
+        self.data[key] = value
+        return True
+
+    async def remove_async(self, key: str) -> bool:
+        self.data.pop(key, None)
+        return True
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def shared_loop() -> asyncio.AbstractEventLoop:
+    """Jedna pętla asyncio w wątku tła dla wszystkich stron (jak pętla serwera Flet)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="harness-loop", daemon=True).start()
+        return _loop
+
+
+class FakePage:
+    """
+    Zamiennik ft.Page dla main(page) bez klienta Flet. Zlicza wywołania
+    page.update (i liczbę przekazanych kontrolek), page.run_task wykonuje
+    we wspólnej pętli w tle, a page.run_thread od razu, w wątku wywołującym -
+    dzięki temu przebieg sesji jest deterministyczny.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None, platform: str = "linux", web: bool = False):
+        self.loop = loop or shared_loop()
+        self.platform = platform
+        self.web = web
+        self.title = None
+        self.dialog = None
+        self.controls = []
+        self.session = FakeSessionStorage()
+        self.client_storage = FakeClientStorage()
+        self.updates = 0
+        self.updated_controls = 0
+
+    def __bool__(self):
+        return True
+
+    def update(self, *controls):
+        self.updates += 1
+        self.updated_controls += len(controls) or 1
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+        self.update()
+
+    def run_task(self, handler, *args):
+        return asyncio.run_coroutine_threadsafe(handler(*args), self.loop)
+
+    def run_thread(self, handler, *args):
+        handler(*args)
+
+
+def walk_controls(control):
+    yield control
+    for child in getattr(control, "controls", None) or []:
+        yield from walk_controls(child)
+    content = getattr(control, "content", None)
+    if isinstance(content, ft.Control):
+        yield from walk_controls(content)
+
+
+class HandlerStats:
+    """Czas ściany i liczba page.update na każde wywołanie obsługi zdarzenia."""
+
+    def __init__(self):
+        self.timings = {}
+        self.updates = {}
+
+    def record(self, name: str, seconds: float, updates: int):
+        self.timings.setdefault(name, []).append(seconds)
+        self.updates.setdefault(name, []).append(updates)
+
+    def summary(self) -> list:
+        rows = []
+        for name, timings in self.timings.items():
+            ordered = sorted(timings)
+            updates = self.updates[name]
+            rows.append({
+                "handler": name,
+                "calls": len(ordered),
+                "p50_ms": statistics.median(ordered) * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "updates_avg": sum(updates) / len(updates),
+                "updates_max": max(updates),
+            })
+        return sorted(rows, key=lambda row: -row["p95_ms"])
+
+
+class HeadlessSession:
+    """
+    Jedna sesja gry uruchomiona przez main(page) na FakePage. Kontrolki są
+    odszukiwane po kluczach (key=...) nadanych w main, a ich obsługa zdarzeń
+    wywoływana bezpośrednio - tak jak zrobiłby to klient Flet.
+    """
+
+    def __init__(self, app_main, stats: HandlerStats | None = None, page: FakePage | None = None):
+        self.page = page or FakePage()
+        self.stats = stats or HandlerStats()
+        self.steps = 0
+        self.bonus_total = 0
+        app_main(self.page)
+        self.game_state = self.page.session.get("game_state")
+        self.controls = {}
+        for root in self.page.controls:
+            for control in walk_controls(root):
+                if getattr(control, "key", None):
+                    self.controls[control.key] = control
+
+    # --- Wywoływanie obsługi zdarzeń ---
+
+    def fire(self, name: str, handler, control, event_name: str = "click"):
+        self.steps += 1
+        if self.steps > MAX_STEPS_PER_SESSION:
+            raise HarnessError(f"Sesja przekroczyła {MAX_STEPS_PER_SESSION} kroków.")
+        event = ft.ControlEvent(target=control.uid, name=event_name, data=None, control=control, page=self.page)
+        bonus = self.game_state["current_bonus_pot"]
+        updates = self.page.updates
+        started = time.perf_counter()
+        handler(event)
+        self.stats.record(name, time.perf_counter() - started, self.page.updates - updates)
+        # Bonus banku rośnie tylko przy licytacji (nowa runda zeruje go bez zwrotu)
+        self.bonus_total += max(0, self.game_state["current_bonus_pot"] - bonus)
+        self.check_ledger(name)
+
+    def click(self, key: str):
+        control = self.controls[key]
+        if control.disabled or not control.visible:
+            raise HarnessError(f"Kliknięcie nieaktywnej kontrolki '{key}'.")
+        self.fire(key, control.on_click, control)
+
+    def enabled(self, key: str) -> bool:
+        control = self.controls[key]
+        return control.visible is not False and not control.disabled
+
+    # --- Akcje gracza ---
+
+    def choose_set(self, set_name: str):
+        self.click(f"set_{set_name}")
+
+    def set_switch(self, key: str, value: bool):
+        control = self.controls[key]
+        control.value = value
+        self.fire(key, control.on_change, control, "change")
+
+    def bid(self) -> bool:
+        if not self.enabled("bid_100"):
+            return False
+        self.click("bid_100")
+        return True
+
+    def type_answer(self, text: str):
+        field = self.controls["answer_field"]
+        field.value = text
+        if field.on_change:
+            self.fire("answer_field", field.on_change, field, "change")
+
+    def submit_answer(self, text: str):
+        self.type_answer(text)
+        self.click("submit_answer")
+
+    def abcd_buttons(self) -> list:
+        return [btn for btn in self.controls["abcd_answers"].controls if btn.visible is not False and not btn.disabled]
+
+    def pick_abcd(self, answer: str):
+        for btn in self.abcd_buttons():
+            if btn.data == answer:
+                self.fire("abcd_answer", btn.on_click, btn)
+                return
+        raise HarnessError(f"Brak aktywnej odpowiedzi ABCD '{answer}'.")
+
+    def dialog_open(self) -> bool:
+        return bool(self.page.dialog and self.page.dialog.open)
+
+    def dialog_action(self, index: int):
+        button = self.page.dialog.actions[index]
+        self.fire(f"dialog_{index}", button.on_click, button)
+
+    # --- Niezmienniki ---
+
+    def current_question(self):
+        return self.game_state["active_question_set"][self.game_state["current_question_index"]]
+
+    def check_ledger(self, step: str):
+        # Pieniądze nie znikają ani się nie mnożą: kasa + pula + wydatki = start + bonusy banku
+        state = self.game_state
+        total = state["money"] + state["main_pot"] + state["money_spent_on_hints"]
+        if total != START_MONEY + self.bonus_total:
+            raise HarnessError(f"Po '{step}': kasa {state['money']} + pula {state['main_pot']} + wydatki "
+                               f"{state['money_spent_on_hints']} != {START_MONEY} + bonusy {self.bonus_total}")
+        if state["money"] < 0:
+            raise HarnessError(f"Po '{step}': ujemna kasa {state['money']}.")
+
+
+def play_session(session: HeadlessSession, set_name: str, rng: random.Random) -> dict:
+    """
+    Scenariusz bota: licytuje losowo, czasem kupuje ABCD i 50/50, odpowiada
+    poprawnie z prawdopodobieństwem ACCURACY i gra do końca zestawu (albo kasy).
+    """
+    state = session.game_state
+    session.choose_set(set_name)
+    if state["phase"] != "bidding":
+        raise HarnessError(f"Zestaw {set_name}: po wyborze faza '{state['phase']}' zamiast 'bidding'.")
+
+    while not session.dialog_open():
+        for _ in range(rng.randint(0, MAX_BIDS_PER_ROUND)):
+            if not session.bid():
+                break
+        session.click("start_answering")
+        if session.dialog_open():
+            break
+
+        question = session.current_question()
+        # ABCD tylko gdy poprawna odpowiedź jest wśród opcji (w kilku pytaniach jej brak)
+        abcd_possible = question.correct in question.answers
+        if abcd_possible and session.enabled("buy_abcd") and rng.random() < ABCD_RATE:
+            session.click("buy_abcd")
+            if state["abcd_unlocked"] and session.enabled("hint_5050") and rng.random() < HINT_RATE:
+                session.click("hint_5050")
+
+        pot = state["main_pot"]
+        money = state["money"]
+        answer_correctly = rng.random() < ACCURACY
+        if state["abcd_unlocked"]:
+            wrong = [btn.data for btn in session.abcd_buttons() if btn.data != question.correct]
+            answer_correctly = answer_correctly or not wrong
+            session.pick_abcd(question.correct if answer_correctly else rng.choice(wrong))
+        else:
+            session.submit_answer(question.correct if answer_correctly else WRONG_ANSWER)
+
+        if state["phase"] != "answered":
+            raise HarnessError(f"Po odpowiedzi faza '{state['phase']}' zamiast 'answered'.")
+        expected = (money + pot, 0) if answer_correctly else (money, pot)
+        if (state["money"], state["main_pot"]) != expected:
+            raise HarnessError(f"Pytanie '{question.question}': kasa/pula {state['money']}/{state['main_pot']}, "
+                               f"oczekiwano {expected[0]}/{expected[1]}.")
+        session.click("next")
+
+    if state["phase"] != "over":
+        raise HarnessError(f"Koniec sesji w fazie '{state['phase']}' zamiast 'over'.")
+    finished = state["current_question_index"] >= state["total_questions"]
+    if not finished and state["money"] >= state["base_stake"]:
+        raise HarnessError(f"Koniec gry przy pytaniu {state['current_question_index'] + 1} mimo {state['money']} zł.")
+
+    # Zamknięcie okna końca gry przenosi do menu
+    session.dialog_action(1)
+    if state["phase"] != "menu":
+        raise HarnessError(f"Po powrocie do menu faza '{state['phase']}'.")
+    return {"set": set_name, "finished": finished, "money": state["money"], "steps": session.steps}
+
+
+def run_sessions(app_main, sessions: int = HARNESS_SESSIONS, sets=HARNESS_SETS, seed: int = HARNESS_SEED) -> dict:
+    """Uruchamia `sessions` sesji scenariusza bota i zwraca statystyki obsługi zdarzeń."""
+    # Koszty podpowiedzi i kolejność ABCD losuje main przez moduł random
+    random.seed(seed)
+    stats = HandlerStats()
+    results = []
+    failures = []
+    started = time.perf_counter()
+    for index in range(sessions):
+        set_name = sets[index % len(sets)]
+        session = HeadlessSession(app_main, stats)
+        try:
+            results.append(play_session(session, set_name, random.Random(seed + index)))
+        except HarnessError as e:
+            failures.append(f"sesja {index} (zestaw {set_name}): {e}")
+    return {
+        "sessions": sessions,
+        "finished": sum(1 for result in results if result["finished"]),
+        "failures": failures,
+        "elapsed": time.perf_counter() - started,
+        "handlers": stats.summary(),
+    }
+
+
+def print_report(report: dict):
+    print(f"Sesje: {report['sessions']}, ukończone zestawy: {report['finished']}, "
+          f"błędy: {len(report['failures'])}, czas: {report['elapsed']:.1f} s")
+    print(f"{'obsługa':18s} {'wywołań':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s} {'upd. śr.':>9s} {'upd. max':>9s}")
+    for row in report["handlers"]:
+        print(f"{row['handler']:18s} {row['calls']:8d} {row['p50_ms']:8.3f} {row['p95_ms']:8.3f} "
+              f"{row['max_ms']:8.3f} {row['updates_avg']:9.2f} {row['updates_max']:9d}")
+    for failure in report["failures"][:20]:
+        print(f"    BŁĄD: {failure}")
+
+
+if __name__ == "__main__":
+    # Sesje bez interfejsu (np. w CI): python harness.py [--sessions N] [--max-p95-ms MS]
+    parser = argparse.ArgumentParser(description="Skryptowane sesje gry bez klienta Flet.")
+    parser.add_argument("--sessions", type=int, default=HARNESS_SESSIONS)
+    parser.add_argument("--seed", type=int, default=HARNESS_SEED)
+    parser.add_argument("--sets", default=",".join(HARNESS_SETS), help="zestawy rozdzielone przecinkami")
+    parser.add_argument("--max-p95-ms", type=float, default=None,
+                        help="błąd, jeśli p95 którejkolwiek obsługi zdarzenia przekroczy ten czas")
+    args = parser.parse_args()
+
+    # Ranking i pobrane zestawy w katalogu tymczasowym, bez połączeń z serwerami
+    data_dir = tempfile.TemporaryDirectory()
+    os.environ["FLET_APP_STORAGE_DATA"] = data_dir.name
+    os.environ.pop("AWANTURA_LEADERBOARD_URL", None)
+    os.environ["AWANTURA_CONTENT_URL"] = ""  # pusta wartość wyłącza też adres z manifestu
+
+    from main import main as app_main
+
+    report = run_sessions(app_main, args.sessions, args.sets.split(","), args.seed)
+    print_report(report)
+
+    slow = [row for row in report["handlers"] if args.max_p95_ms is not None and row["p95_ms"] > args.max_p95_ms]
+    for row in slow:
+        print(f"    ZA WOLNO: {row['handler']} p95 {row['p95_ms']:.3f} ms > {args.max_p95_ms} ms")
+    sys.exit(1 if report["failures"] or slow else 0)
@@ -0,0 +1,381 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- STAŁE: Ranking ---
+LEADERBOARD_DB = "leaderboard.sqlite3"
+LEADERBOARD_URL_ENV = "AWANTURA_LEADERBOARD_URL"  # adres serwera rankingu (opcjonalny)
+GLOBAL_BOARD = ""  # nazwa "zestawu" rankingu globalnego w tabeli score_counts
+DEFAULT_PLAYER = "Gracz"
+SUBMIT_BATCH_SIZE = 100
+SUBMIT_MAX_RETRIES = 3
+SUBMIT_RETRY_DELAY = 0.5  # sekundy, podwajane przy każdej kolejnej próbie
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    set_name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    sent INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_scores_set_score ON scores (set_name, score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_score ON scores (score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_player ON scores (player, set_name, score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_unsent ON scores (id) WHERE sent = 0;
+
+-- Histogram wyników: pozycja w rankingu to suma liczników wyższych wyników,
+-- więc nie trzeba liczyć wszystkich wierszy tabeli scores.
+CREATE TABLE IF NOT EXISTS score_counts (
+    set_name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (set_name, score)
+) WITHOUT ROWID;
+"""
+
+
+def default_db_path() -> str:
+    """Plik bazy w katalogu danych aplikacji (APK/desktop) lub w katalogu bieżącym."""
+    return os.path.join(os.getenv("FLET_APP_STORAGE_DATA", "."), LEADERBOARD_DB)
+
+
+class LeaderboardStore:
+    """
+    Lokalny ranking w SQLite - osobno dla każdego zestawu i globalnie.
+
+    Jedno połączenie na proces, chronione blokadą, więc obiekt może być
+    współdzielony przez wszystkie sesje serwera.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add_scores(self, entries, sent: bool = False) -> int:
+        """
+        Dodaje wyniki w jednej transakcji. `entries` to krotki
+        (gracz, zestaw, wynik[, znacznik czasu]). Zwraca liczbę dodanych wyników.
+        """
+        now = time.time()
+        rows = []
+        counts = {}
+        for entry in entries:
+            player, set_name, score = entry[0], entry[1], int(entry[2])
+            created_at = entry[3] if len(entry) > 3 else now
+            rows.append((player, set_name, score, created_at, int(sent)))
+            for board in (set_name, GLOBAL_BOARD):
+                counts[(board, score)] = counts.get((board, score), 0) + 1
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO scores (player, set_name, score, created_at, sent) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                "INSERT INTO score_counts (set_name, score, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (set_name, score) DO UPDATE SET count = count + excluded.count",
+                [(board, score, n) for (board, score), n in counts.items()],
+            )
+        return len(rows)
+
+    def top(self, set_name: str | None = None, k: int = 10) -> list:
+        """Najlepsze wyniki: [(gracz, zestaw, wynik), ...] od najwyższego."""
+        with self._lock:
+            if set_name is None:
+                cursor = self._conn.execute(
+                    "SELECT player, set_name, score FROM scores ORDER BY score DESC LIMIT ?", (k,)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "SELECT player, set_name, score FROM scores WHERE set_name = ? "
+                    "ORDER BY score DESC LIMIT ?",
+                    (set_name, k),
+                )
+            return cursor.fetchall()
+
+    def rank(self, score: int, set_name: str | None = None) -> int:
+        """Pozycja (od 1), którą zająłby `score` w rankingu zestawu lub globalnym."""
+        board = GLOBAL_BOARD if set_name is None else set_name
+        with self._lock:
+            (higher,) = self._conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM score_counts WHERE set_name = ? AND score > ?",
+                (board, int(score)),
+            ).fetchone()
+        return higher + 1
+
+    def player_best(self, player: str, set_name: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score FROM scores WHERE player = ? AND set_name = ? ORDER BY score DESC LIMIT 1",
+                (player, set_name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def player_rank(self, player: str, set_name: str) -> int | None:
+        """Pozycja najlepszego wyniku gracza w rankingu zestawu (None - brak wyników)."""
+        best = self.player_best(player, set_name)
+        return None if best is None else self.rank(best, set_name)
+
+    def best_scores(self) -> dict:
+        """
+        Rekord każdego zestawu: {"01": 15300, ...}. Kolejne zestawy i ich maksima
+        to pojedyncze wyszukania w kluczu histogramu - GROUP BY czytałby całą tabelę.
+        """
+        best = {}
+        with self._lock:
+            board = GLOBAL_BOARD
+            while True:
+                row = self._conn.execute(
+                    "SELECT set_name FROM score_counts WHERE set_name > ? ORDER BY set_name LIMIT 1",
+                    (board,),
+                ).fetchone()
+                if row is None:
+                    return best
+                board = row[0]
+                (best[board],) = self._conn.execute(
+                    "SELECT MAX(score) FROM score_counts WHERE set_name = ?", (board,)
+                ).fetchone()
+
+    def pending(self, limit: int) -> list:
+        """Wyniki jeszcze niewysłane na serwer: [(id, gracz, zestaw, wynik, czas), ...]."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, player, set_name, score, created_at FROM scores WHERE sent = 0 ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def mark_sent(self, ids):
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE scores SET sent = 1 WHERE id = ?", [(i,) for i in ids])
+
+
+class HttpLeaderboardBackend:
+    """
+    Zdalny ranking przez HTTP: POST {base_url}/scores z paczką wyników w JSON.
+    Adres można podmienić na lokalny serwer (zob. serve_local).
+    """
+
+    def __init__(self, base_url: str, timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def submit_batch(self, entries: list):
+        body = json.dumps({
+            "scores": [
+                {"player": player, "set": set_name, "score": score, "ts": created_at}
+                for player, set_name, score, created_at in entries
+            ]
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.base_url}/scores",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 300:
+                raise OSError(f"HTTP {response.status}")
+
+
+class LeaderboardService:
+    """
+    Zapisuje wyniki lokalnie i (jeśli podano backend) wysyła je paczkami,
+    ponawiając nieudane wysyłki. Niewysłane wyniki czekają w bazie do
+    następnego flush(), także po restarcie aplikacji.
+    """
+
+    def __init__(self, store: LeaderboardStore, backend=None,
+                 batch_size: int = SUBMIT_BATCH_SIZE, max_retries: int = SUBMIT_MAX_RETRIES,
+                 retry_delay: float = SUBMIT_RETRY_DELAY):
+        self.store = store
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._flush_lock = threading.Lock()
+
+    def record(self, set_name: str, score: int, player: str = DEFAULT_PLAYER):
+        self.store.add_scores([(player, set_name, score)], sent=self.backend is None)
+
+    def flush(self) -> int:
+        """Wysyła zaległe wyniki. Zwraca liczbę wysłanych wyników."""
+        if self.backend is None:
+            return 0
+        # Jedna wysyłka naraz - kolejne wywołania w tym czasie nic nie robią
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        sent_total = 0
+        try:
+            while True:
+                batch = self.store.pending(self.batch_size)
+                if not batch:
+                    break
+                if not self._submit_with_retry([row[1:] for row in batch]):
+                    break
+                self.store.mark_sent([row[0] for row in batch])
+                sent_total += len(batch)
+        finally:
+            self._flush_lock.release()
+        return sent_total
+
+    def _submit_with_retry(self, entries: list) -> bool:
+        delay = self.retry_delay
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.backend.submit_batch(entries)
+                return True
+            except Exception as e:
+                print(f"Ranking: wysyłka {len(entries)} wyników nie powiodła się (próba {attempt}). Błąd: {e}")
+                if attempt < self.max_retries:
+                    time.sleep(delay)
+                    delay *= 2
+        return False
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_leaderboard() -> LeaderboardService | None:
+    """
+    Wspólna usługa rankingu dla całego procesu (tworzona przy pierwszym użyciu).
+    Zwraca None, jeśli bazy nie da się otworzyć - gra działa wtedy bez rankingu.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            try:
+                store = LeaderboardStore(default_db_path())
+            except Exception as e:
+                print(f"Ranking: nie można otworzyć bazy. Błąd: {e}")
+                return None
+            url = os.getenv(LEADERBOARD_URL_ENV)
+            _service = LeaderboardService(store, HttpLeaderboardBackend(url) if url else None)
+        return _service
+
+
+# --- Lokalny serwer rankingu (zastępuje zdalny backend podczas testów) ---
+
+def make_handler(store: LeaderboardStore):
+    class LeaderboardRequestHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/scores":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length))
+                entries = [(s["player"], s["set"], s["score"], s["ts"]) for s in payload["scores"]]
+            except (ValueError, KeyError, TypeError):
+                self.send_error(400)
+                return
+            added = store.add_scores(entries, sent=True)
+            self._send_json({"added": added})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/top":
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            set_name = query.get("set", [None])[0]
+            k = int(query.get("k", ["10"])[0])
+            self._send_json({"top": store.top(set_name, k)})
+
+        def _send_json(self, data):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return LeaderboardRequestHandler
+
+
+def serve_local(host: str = "127.0.0.1", port: int = 0, store: LeaderboardStore | None = None):
+    """
+    Uruchamia w tle lokalny serwer rankingu. Zwraca (serwer, adres_bazowy);
+    port 0 oznacza dowolny wolny port. Zatrzymanie: serwer.shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(store or LeaderboardStore()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def benchmark(entries: int = 1_000_000, score_step: int = 50, repeat: int = 200, seed: int = 0) -> dict:
+    """
+    Czasy zapytań rankingu (mediana w ms) w bazie w pamięci z `entries` wynikami
+    losowo rozłożonymi na 50 zestawów. Wyniki gry są wielokrotnościami 50 zł
+    (score_step=50, ok. 1000 różnych wartości); score_step=1 daje przypadek
+    pesymistyczny - prawie każdy wynik inny, więc histogram rośnie razem z tabelą.
+    """
+    import random
+    import statistics
+
+    rng = random.Random(seed)
+    store = LeaderboardStore()
+    batch = 100_000
+    for start in range(0, entries, batch):
+        store.add_scores(
+            (f"P{rng.randrange(10_000)}", f"{rng.randrange(1, 51):02d}", rng.randrange(0, 50_000, score_step))
+            for _ in range(min(batch, entries - start))
+        )
+
+    queries = {
+        "top(zestaw)": lambda: store.top("07"),
+        "top(globalny)": lambda: store.top(None),
+        "rank(zestaw)": lambda: store.rank(25_000, "07"),
+        "rank(globalny)": lambda: store.rank(25_000),
+        "player_rank": lambda: store.player_rank("P42", "07"),
+        "best_scores": store.best_scores,
+    }
+    results = {}
+    for name, query in queries.items():
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            times.append((time.perf_counter() - started) * 1000)
+        results[name] = statistics.median(times)
+    store.close()
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["benchmark"]:
+        # python leaderboard.py benchmark [liczba_wyników] [krok_wyniku]
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+        step = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+        for name, ms in benchmark(count, step).items():
+            print(f"{name:16s} {ms:8.3f} ms (mediana, {count} wyników, krok {step} zł)")
+        sys.exit(0)
+
+    # Lokalny serwer do gry "online" bez prawdziwego backendu:
+    #   python leaderboard.py  ->  AWANTURA_LEADERBOARD_URL=http://127.0.0.1:8765
+    server, url = serve_local(port=8765, store=LeaderboardStore("leaderboard_server.sqlite3"))
+    print(f"Ranking: lokalny serwer działa pod {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,13 +1,47 @@
+# Profil startu mierzony od pierwszej linii (także import flet)
+from startup_profile import PROCESS_PROFILE, session_profile
+
 import flet as ft
+import asyncio
+import hashlib
+import math
 import random
-import re
 import os
-# Wymagana biblioteka do "fuzzy matching"
-from thefuzz import fuzz
+import threading
+import time
+
+PROCESS_PROFILE.mark("import flet")
+
+from answer_matching import get_matcher, load_fuzz
+from content_updates import get_content_cache, get_content_updater
+from manifest import MANIFEST_FILE, SET_CATEGORIES, SET_COUNT, parse_content_url, parse_manifest
+from question_sources import SOURCE_TYPES, SourceQuestions, make_question, open_source, parse_text_questions
+from typeahead import TYPEAHEAD_DEBOUNCE, get_answer_trie
+
+PROCESS_PROFILE.mark("importy modułów gry")
 
 # --- STAŁA: Folder z zasobami ---
 ASSETS_DIR = "assets"
 
+# --- STAŁE: Własne banki pytań ---
+BANKS_DIR = "banks"  # assets/banks/ oraz <katalog danych aplikacji>/banks/
+BANK_EXTENSIONS = tuple(ext for ext in SOURCE_TYPES if ext != ".txt")  # .txt to zestawy NN
+
+# --- STAŁE: Tryb na czas ---
+ANSWER_TIME_LIMIT = 30  # sekundy na odpowiedź
+BIDDING_TIME_LIMIT = 20  # sekundy na licytację
+TIMER_MAX_FPS = 4  # maksymalna liczba "ticków" na sekundę (wspólna dla wszystkich sesji)
+
+
+# Sparsowane zestawy wspólne dla wszystkich sesji (rekordy Question są niezmienne)
+QUESTION_SET_CACHE = {}
+
+# Manifest zestawów (assets/manifest.json), wczytywany raz na proces
+BUNDLED_MANIFEST = None
+# ... z nałożonymi wpisami zestawów pobranych przez content_updates
+SET_MANIFEST = None
+# Adres serwera treści wbudowany w manifest (AWANTURA_CONTENT_URL go nadpisuje)
+BUNDLED_CONTENT_URL = None
 
 # --------------------
 
@@ -18,8 +52,43 @@ def parse_question_file(page: ft.Page, filename: str) -> list:
     Implementuje "ogólną logikę" próbującą dwóch ścieżek:
     1. Oficjalnej (w folderze /assets)
     2. Awaryjnej (w folderze głównym /)
+
+    Pliki innych formatów (.json, .jsonl, .csv, .sqlite3) są czytane przez
+    odpowiednie źródło z question_sources (na tych samych dwóch ścieżkach).
+    Zaktualizowane zestawy .txt (content_updates) mają pierwszeństwo przed assets.
+
+    Zestaw jest parsowany raz na proces - kolejne sesje dostają tę samą listę.
+    """
+    cached = QUESTION_SET_CACHE.get(filename)
+    if cached is not None:
+        return cached
+
+    questions = read_question_file(page, filename)
+    if questions:
+        QUESTION_SET_CACHE[filename] = questions
+    return questions
+
+
+def read_question_file(page: ft.Page, filename: str) -> list:
+    """Czyta i parsuje plik zestawu (bez pamięci podręcznej)."""
+    if not filename.lower().endswith(".txt"):
+        return load_question_source(filename)
+
+    content = get_content_cache().read_text(filename)
+    if content is None:
+        content = read_asset_text(page, filename)
+    if content is None:
+        return []
+
+    # Dalsze parsowanie pliku (wspólne z TextQuestionSource)
+    return parse_text_questions(content)
+
+
+def read_asset_text(page: ft.Page, filename: str) -> str | None:
+    """
+    Czyta plik tekstowy z zasobów aplikacji (assets/, potem katalog główny)
+    w sposób właściwy dla platformy. Zwraca None, gdy obie ścieżki zawiodą.
     """
-    parsed_questions = []
     content = ""
 
     # Ścieżka 1: Poprawna ścieżka do zasobów (w folderze assets)
@@ -86,65 +155,353 @@ def parse_question_file(page: ft.Page, filename: str) -> list:
     except Exception as e:
         # Błąd ostateczny - jeśli obie ścieżki zawiodą
         print(f"KRYTYCZNY BŁĄD: Nie można otworzyć pliku ani na ścieżce 1, ani na 2. Ostatnia próba: {path2}. Platforma: {page.platform}, Web: {page.web}. Błąd: {e}")
-        return []
+        return None
+
+    return content
+
+
+def load_set_manifest(page: ft.Page) -> dict | None:
+    """
+    Zwraca manifest zestawów {"01": wpis, ...} (generowany przez manifest.py).
+    None - brak manifestu; menu wraca wtedy do założenia, że pliki 01-50 istnieją.
+    """
+    global BUNDLED_MANIFEST, SET_MANIFEST, BUNDLED_CONTENT_URL
+    if SET_MANIFEST is None:
+        content = read_asset_text(page, MANIFEST_FILE)
+        BUNDLED_MANIFEST = parse_manifest(content) if content else None
+        BUNDLED_CONTENT_URL = parse_content_url(content) if content else None
+        if BUNDLED_MANIFEST is not None:
+            SET_MANIFEST = {**BUNDLED_MANIFEST, **get_content_cache().entries()}
+    return SET_MANIFEST
+
+
+def load_leaderboard():
+    """
+    Ranking (sqlite3, http.server) importowany dopiero po pierwszej klatce.
+    None - brak rankingu, gra działa wtedy bez niego.
+    """
+    try:
+        from leaderboard import get_leaderboard
+    except ImportError:
+        # Np. web (Pyodide) bez modułu sqlite3 - gra działa wtedy bez rankingu
+        return None
+    return get_leaderboard()
 
-    # Dalsze parsowanie pliku (bez zmian)
-    question_blocks = re.split(r'\n(?=\d+\.)', content)
 
-    for block in question_blocks:
-        block = block.strip()
-        if not block:
+def check_content_updates(page: ft.Page, on_update=None):
+    """
+    Pobiera w tle zmienione zestawy z serwera treści (content_url z manifestu
+    lub AWANTURA_CONTENT_URL) i unieważnia ich sparsowane kopie - kolejne gry
+    dostają nową wersję. `on_update(zestawy)` odświeża menu sesji, która
+    zleciła sprawdzenie (pozostałe sesje zobaczą zmiany przy następnym starcie).
+    """
+    updater = get_content_updater(BUNDLED_CONTENT_URL)
+    if updater is None or page.web:
+        return
+    load_set_manifest(page)
+    try:
+        report = updater.update(BUNDLED_MANIFEST)
+    except Exception as e:
+        print(f"Aktualizacja: nie można sprawdzić aktualizacji zestawów. Błąd: {e}")
+        return
+    if not report["changed"]:
+        return
+
+    entries = get_content_cache().entries()
+    for set_name in report["changed"]:
+        QUESTION_SET_CACHE.pop(f"{set_name}.txt", None)
+        if SET_MANIFEST is not None:
+            SET_MANIFEST[set_name] = entries.get(set_name) or BUNDLED_MANIFEST.get(set_name)
+    print(f"Aktualizacja: zaktualizowano zestawy {', '.join(report['changed'])} "
+          f"({report['bytes']} B, {report['seconds'] * 1000:.0f} ms).")
+    if on_update is not None:
+        on_update(report["changed"])
+
+
+def load_question_source(filename: str) -> SourceQuestions | list:
+    """
+    Otwiera plik .json/.jsonl/.csv/.sqlite3 (assets/, potem katalog główny)
+    jako zestaw czytany na żądanie - gra pobiera pytania po indeksie.
+    """
+    for path in (os.path.join(ASSETS_DIR, filename), filename):
+        if not os.path.exists(path):
             continue
+        try:
+            questions = SourceQuestions(open_source(path), path)
+            print(f"Źródło pytań: otwarto {len(questions)} pytań z {path}.")
+            return questions
+        except Exception as e:
+            print(f"KRYTYCZNY BŁĄD: Nie można wczytać źródła pytań {path}. Błąd: {e}")
+            return []
+    print(f"KRYTYCZNY BŁĄD: Nie znaleziono pliku {filename} ani w '{ASSETS_DIR}/', ani w '/'.")
+    return []
+
+
+def find_question_banks() -> list:
+    """
+    Własne banki pytań (.json/.jsonl/.csv/.sqlite3) z assets/banks/ oraz z
+    katalogu danych aplikacji (tam można je wgrać na telefonie).
+    Zwraca posortowane ścieżki do przekazania parse_question_file.
+    """
+    banks = []
+    directories = [os.path.join(ASSETS_DIR, BANKS_DIR)]
+    storage_dir = os.getenv("FLET_APP_STORAGE_DATA")
+    if storage_dir:
+        directories.append(os.path.join(storage_dir, BANKS_DIR))
+    for directory in directories:
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        banks += [os.path.join(directory, name) for name in names if name.lower().endswith(BANK_EXTENSIONS)]
+    return banks
 
-        match = re.match(
-            r"^\d+\.\s(.*?)\n"
-            r"prawid(?:l|ł)owa\s+odpowied(?:z|ź)\s*=\s*(.*?)\n"
-            r"odpowied(?:z|ź)\s+abcd\s*=\s*A\s*=\s*(.*?), B\s*=\s*(.*?), C\s*=\s*(.*?), D\s*=\s*(.*?)$",
-            block, re.DOTALL | re.IGNORECASE
-        )
 
-        if match:
-            try:
-                question = match.group(1).strip()
-                correct = match.group(2).strip()
-                answers = [
-                    match.group(3).strip(),
-                    match.group(4).strip(),
-                    match.group(5).strip(),
-                    match.group(6).strip(),
-                ]
-                parsed_questions.append({
-                    "question": question,
-                    "correct": correct,
-                    "answers": answers
-                })
-            except Exception as e:
-                print(f"Błąd parsowania bloku: {block[:50]}... Błąd: {e}")
-                pass
-        else:
-            print(f"Blok nie pasuje do wzorca: {block[:50]}...")
-            pass
+class TickScheduler:
+    """
+    Jeden wspólny harmonogram odliczania dla wszystkich sesji.
 
-    return parsed_questions
+    Zamiast osobnego zadania (lub wątku) na każdą sesję, działa jedno zadanie
+    asyncio, które co 1/TIMER_MAX_FPS s przegląda aktywne liczniki. Kontrolka
+    ft.Text jest aktualizowana tylko wtedy, gdy zmieni się wyświetlana liczba
+    sekund, a zadanie kończy się samo, gdy nie ma już aktywnych liczników.
+    """
+
+    def __init__(self, max_fps: int = TIMER_MAX_FPS):
+        self.interval = 1.0 / max_fps
+        self._countdowns = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._task = None
+
+    def start(self, key, page: ft.Page, seconds: int, text_control: ft.Text, on_expire, label: str = "Czas"):
+        """
+        Uruchamia (lub zastępuje) licznik sesji `key`. Po upływie czasu
+        `on_expire` jest wywoływane w wątku obsługi zdarzeń strony.
+        """
+        countdown = {
+            "page": page,
+            "deadline": time.monotonic() + seconds,
+            "text": text_control,
+            "label": label,
+            "shown": None,
+            "on_expire": on_expire,
+        }
+        with self._lock:
+            self._countdowns[key] = countdown
+        self._render(countdown, seconds)
+
+        loop = page.loop
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(self._ensure_running, loop)
+
+    def cancel(self, key) -> bool:
+        """Zatrzymuje licznik sesji. Zwraca True, jeśli licznik był aktywny."""
+        with self._lock:
+            countdown = self._countdowns.pop(key, None)
+        if countdown:
+            countdown["text"].visible = False
+            countdown["text"].value = ""
+        return countdown is not None
+
+    def _ensure_running(self, loop):
+        # Wywoływane zawsze w wątku pętli zdarzeń
+        if self._task is None or self._task.done():
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            expired = []
+            with self._lock:
+                if not self._countdowns:
+                    return
+                for key, countdown in list(self._countdowns.items()):
+                    remaining = countdown["deadline"] - now
+                    if remaining <= 0:
+                        expired.append(self._countdowns.pop(key))
+                    else:
+                        self._render(countdown, math.ceil(remaining))
+
+            for countdown in expired:
+                self._render(countdown, 0)
+                try:
+                    countdown["page"].run_thread(countdown["on_expire"])
+                except Exception as e:
+                    print(f"Timer: nie można wywołać akcji po upływie czasu. Błąd: {e}")
+
+    @staticmethod
+    def _render(countdown: dict, seconds: int):
+        if countdown["shown"] == seconds:
+            return
+        countdown["shown"] = seconds
+        text = countdown["text"]
+        text.value = f"{countdown['label']}: {seconds} s"
+        text.color = "red_600" if seconds <= 5 else "grey_800"
+        text.visible = True
+        try:
+            countdown["page"].update(text)
+        except Exception as e:
+            # Sesja mogła zostać zamknięta - licznik po prostu wygaśnie
+            print(f"Timer: aktualizacja nie powiodła się. Błąd: {e}")
+
+
+# Jeden harmonogram na cały proces (wspólny dla wszystkich sesji web)
+TIMERS = TickScheduler()
+
+
+# --- Zapis / wznowienie przerwanej gry ---
+SNAPSHOT_VERSION = 1
+SNAPSHOT_STATE_KEY = "awantura.snapshot.state"
+SNAPSHOT_SET_KEY = "awantura.snapshot.set"
+SNAPSHOT_WRITE_DELAY = 0.5  # sekundy - zapisy w tym oknie są łączone w jeden
+SNAPSHOT_MAX_INLINE_QUESTIONS = 500  # większe zestawy i banki: tylko odwołanie do pliku
+SNAPSHOT_FIELDS = (
+    "money", "current_question_index", "main_pot", "money_spent_on_hints",
+    "current_bid_amount", "current_bonus_pot", "abcd_unlocked",
+    "question_answered", "timed_mode",
+)
+RESUMABLE_PHASES = ("bidding", "answering", "answered")
+
+
+def encode_snapshot(game_state: dict, feedback: tuple) -> list:
+    """
+    Zwięzły zapis stanu gry: [wersja, zestaw, faza, [pola SNAPSHOT_FIELDS],
+    kolejność ABCD, odpowiedzi usunięte przez 50/50, [tekst, kolor] komunikatu].
+    """
+    return [
+        SNAPSHOT_VERSION,
+        game_state["set_name"],
+        game_state["phase"],
+        [game_state[field] for field in SNAPSHOT_FIELDS],
+        game_state["abcd_order"],
+        game_state["hint_removed"],
+        list(feedback),
+    ]
+
+
+def decode_snapshot(data) -> dict | None:
+    """
+    Odczytuje zapis z encode_snapshot. Zwraca None dla zapisu pustego,
+    uszkodzonego lub z innej wersji formatu.
+    """
+    try:
+        version, set_name, phase, values, abcd_order, hint_removed, feedback = data
+        if version != SNAPSHOT_VERSION or phase not in RESUMABLE_PHASES:
+            return None
+        state = dict(zip(SNAPSHOT_FIELDS, values, strict=True))
+    except (TypeError, ValueError):
+        return None
+    state.update({
+        "set_name": set_name,
+        "phase": phase,
+        "abcd_order": list(abcd_order),
+        "hint_removed": list(hint_removed),
+    })
+    return {"state": state, "feedback": feedback}
+
+
+def question_set_fingerprint(questions) -> str:
+    """
+    Odcisk zestawu do sprawdzenia przy wznowieniu: dla banków czytanych na
+    żądanie rozmiar i czas modyfikacji pliku, dla list sha256 treści pytań.
+    """
+    if isinstance(questions, SourceQuestions):
+        return questions.fingerprint
+    digest = hashlib.sha256()
+    for q in questions:
+        digest.update(f"{q.question}\t{q.correct}\t{'|'.join(q.answers)}\n".encode("utf-8"))
+    return digest.hexdigest()
 
 
-def normalize_answer(text: str) -> str:
+def encode_question_set(set_name: str, questions, filename: str) -> list:
     """
-    Normalizuje odpowiedź.
+    Zestaw pytań w postaci list zamiast słowników (zapisywany raz na grę).
+    Duże zestawy i banki z question_sources nie mieszczą się w client_storage -
+    zapisujemy wtedy odwołanie {plik, liczba pytań, odcisk} i przy wznowieniu
+    otwieramy plik ponownie.
+    """
+    if isinstance(questions, list) and len(questions) <= SNAPSHOT_MAX_INLINE_QUESTIONS:
+        rows = [None if q is None else [q.question, q.correct, *q.answers] for q in questions]
+    else:
+        rows = {"file": filename, "count": len(questions), "fingerprint": question_set_fingerprint(questions)}
+    return [SNAPSHOT_VERSION, set_name, rows]
+
+
+def decode_question_set(data, set_name: str, reopen) -> list | SourceQuestions | None:
+    """
+    Odtwarza zestaw z zapisu. `reopen(filename)` otwiera zestaw zapisany jako
+    odwołanie; zmieniony od tamtej pory plik (inna liczba pytań lub odcisk) daje None.
+    """
+    try:
+        version, saved_name, rows = data
+        if version != SNAPSHOT_VERSION or saved_name != set_name:
+            return None
+        if isinstance(rows, dict):
+            questions = reopen(rows["file"])
+            if len(questions) != rows["count"] or question_set_fingerprint(questions) != rows["fingerprint"]:
+                print(f"Wznowienie: plik {rows['file']} zmienił się od zapisu gry.")
+                return None
+            return questions
+        return [
+            None if row is None else make_question(row[0], row[1], row[2:6])
+            for row in rows
+        ]
+    except (TypeError, ValueError, IndexError, KeyError):
+        return None
+
+
+class SnapshotWriter:
+    """
+    Łączy zapisy do page.client_storage: po każdej akcji zapamiętywana jest
+    tylko najnowsza wartość klucza, a zapis wykonuje w tle jedno zadanie
+    asyncio po SNAPSHOT_WRITE_DELAY sekundach - UI nigdy na niego nie czeka.
     """
-    text = str(text).lower().strip()
-    diacritics = {
-        'ó': 'o', 'ł': 'l', 'ż': 'z', 'ź': 'z', 'ć': 'c',
-        'ń': 'n', 'ś': 's', 'ą': 'a', 'ę': 'e', 'ü': 'u'
-    }
-    for char, replacement in diacritics.items():
-        text = text.replace(char, replacement)
-    text = text.replace('u', 'o')
-    text = "".join(text.split())
-    return text
+
+    def __init__(self, page: ft.Page, delay: float = SNAPSHOT_WRITE_DELAY):
+        self.page = page
+        self.delay = delay
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+    def put(self, key: str, value):
+        """Planuje zapis `value` pod `key` (None usuwa klucz)."""
+        with self._lock:
+            self._pending[key] = value
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self.page.run_task(self._flush)
+        except Exception as e:
+            print(f"Zapis stanu: nie można zaplanować zapisu. Błąd: {e}")
+            with self._lock:
+                self._scheduled = False
+
+    async def _flush(self):
+        await asyncio.sleep(self.delay)
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._scheduled = False
+        for key, value in pending.items():
+            try:
+                if value is None:
+                    await self.page.client_storage.remove_async(key)
+                else:
+                    await self.page.client_storage.set_async(key, value)
+            except Exception as e:
+                print(f"Zapis stanu: zapis '{key}' nie powiódł się. Błąd: {e}")
 
 
 def main(page: ft.Page):
+    profile, print_profile = session_profile()
+    profile.mark("start sesji")
+
     page.title = "Awantura o Kasę - Singleplayer"
     page.vertical_alignment = ft.MainAxisAlignment.START
     page.window_width = 600
@@ -165,9 +522,34 @@ def main(page: ft.Page):
         "current_bonus_pot": 0,
         "active_question_set": [],
         "total_questions": 0,
-        "set_name": ""
+        "set_name": "",
+        "set_snapshot": None,  # zapis zestawu (encode_question_set) - ponawiany przy grze od nowa
+        "timed_mode": False,
+        "typeahead_mode": False,
+        "question_answered": False,
+        "phase": "menu",
+        "abcd_order": [],
+        "hint_removed": []
     }
 
+    # Stan sesji jest dostępny z zewnątrz (np. dla harness.py) przez page.session
+    page.session.set("game_state", game_state)
+
+    # Klucz licznika tej sesji we wspólnym harmonogramie TIMERS
+    timer_key = id(game_state)
+
+    # Upływ czasu (wątek wykonawcy) i kliknięcie gracza mogą nadejść naraz -
+    # zmiany fazy gry wykonujemy pod jedną blokadą sesji
+    session_lock = threading.RLock()
+
+    def with_session_lock(handler):
+        def locked(*args):
+            with session_lock:
+                return handler(*args)
+        return locked
+
+    snapshot_writer = SnapshotWriter(page)
+
     # --- Kontrolki Flet (Elementy UI) ---
 
     # --- WIDOK 1: EKRAN GRY ---
@@ -217,22 +599,42 @@ def main(page: ft.Page):
 
     txt_feedback = ft.Text(value="", size=16, text_align=ft.TextAlign.CENTER)
 
+    txt_timer = ft.Text(
+        value="",
+        size=16,
+        weight=ft.FontWeight.BOLD,
+        color="grey_800",
+        text_align=ft.TextAlign.CENTER,
+        visible=False
+    )
+
     # --- Kontrolki UI Odpowiedzi (grupowane) ---
     txt_answer_field = ft.TextField(
+        key="answer_field",
         label="Wpisz swoją odpowiedź...",
         width=400,
         text_align=ft.TextAlign.CENTER,
         capitalization=ft.TextCapitalization.SENTENCES
     )
 
+    suggestions_row = ft.Row(
+        controls=[],
+        alignment=ft.MainAxisAlignment.CENTER,
+        wrap=True,
+        width=400,
+        visible=False
+    )
+
     btn_submit_answer = ft.Button(
         text="Zatwierdź odpowiedź",
+        key="submit_answer",
         icon="check",
         on_click=None,
         width=400,
     )
 
     answers_container = ft.Column(
+        key="abcd_answers",
         controls=[],
         spacing=10,
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
@@ -242,6 +644,7 @@ def main(page: ft.Page):
     answer_ui_container = ft.Column(
         [
             txt_answer_field,
+            suggestions_row,
             btn_submit_answer,
             answers_container,
         ],
@@ -252,6 +655,7 @@ def main(page: ft.Page):
     # --- Kontrolki UI Licytacji (grupowane) ---
     btn_bid_100 = ft.Button(
         text="Licytuj +100 zł (Suma: 0 zł)",
+        key="bid_100",
         icon="add",
         on_click=None,
         width=400,
@@ -259,6 +663,7 @@ def main(page: ft.Page):
 
     btn_start_answering = ft.Button(
         text="Pokaż pytanie",
+        key="start_answering",
         icon="gavel",
         on_click=None,
         width=400,
@@ -276,6 +681,7 @@ def main(page: ft.Page):
     # --- Kontrolki Podpowiedzi i Nawigacji ---
     btn_hint_5050 = ft.Button(
         text="Kup podpowiedź 50/50 (losowo 500-2500 zł)",
+        key="hint_5050",
         icon="lightbulb_outline",
         on_click=None,
         width=400,
@@ -284,6 +690,7 @@ def main(page: ft.Page):
 
     btn_buy_abcd = ft.Button(
         text="Kup opcje ABCD (losowo 1000-3000 zł)",
+        key="buy_abcd",
         icon="view_list",
         on_click=None,
         width=400,
@@ -292,6 +699,7 @@ def main(page: ft.Page):
 
     btn_next = ft.Button(
         text="Następne pytanie",
+        key="next",
         on_click=None,
         visible=False,
         width=400
@@ -299,6 +707,7 @@ def main(page: ft.Page):
 
     btn_back_to_menu = ft.Button(
         text="Wróć do menu",
+        key="back_to_menu",
         icon="arrow_back",
         on_click=None,
         width=400,
@@ -340,6 +749,11 @@ def main(page: ft.Page):
                 padding=ft.padding.only(bottom=5)
             ),
 
+            ft.Container(
+                content=txt_timer,
+                alignment=ft.alignment.center
+            ),
+
             # Poprawiony kontener (usunięty błąd składni)
             ft.Container(
                 content=txt_question,
@@ -368,6 +782,8 @@ def main(page: ft.Page):
         visible=False
     )
 
+    profile.mark("kontrolki gry")
+
     # --- WIDOK 2: EKRAN GŁÓWNY (MENU) ---
 
     main_menu_feedback = ft.Text(
@@ -377,30 +793,145 @@ def main(page: ft.Page):
         text_align=ft.TextAlign.CENTER
     )
 
+    def toggle_timed_mode(e):
+        game_state["timed_mode"] = bool(e.control.value)
+
+    # Stan podpowiedzi tej sesji (samo drzewo jest wspólne dla wszystkich sesji)
+    typeahead = {"trie": None, "last_change": 0.0, "pending": False, "shown": []}
+
+    def load_question_bank():
+        bank = []
+        for index in range(1, SET_COUNT + 1):
+            entry = set_manifest.get(f"{index:02d}") if set_manifest else None
+            if set_manifest is not None and not (entry and entry["questions"]):
+                continue
+            bank.extend(parse_question_file(page, f"{index:02d}.txt"))
+        return bank
+
+    def build_answer_trie():
+        typeahead["trie"] = get_answer_trie(load_question_bank)
+
+    def toggle_typeahead_mode(e):
+        game_state["typeahead_mode"] = bool(e.control.value)
+        if game_state["typeahead_mode"] and typeahead["trie"] is None:
+            page.run_thread(build_answer_trie)
+
+    sw_typeahead_mode = ft.Switch(
+        key="typeahead_mode",
+        label="Podpowiedzi przy wpisywaniu odpowiedzi",
+        value=False,
+        on_change=toggle_typeahead_mode
+    )
+
+    sw_timed_mode = ft.Switch(
+        key="timed_mode",
+        label=f"Tryb na czas ({BIDDING_TIME_LIMIT} s licytacja / {ANSWER_TIME_LIMIT} s odpowiedź)",
+        value=False,
+        on_change=toggle_timed_mode
+    )
+
+    # Ranking jest wczytywany po pierwszej klatce (zob. koniec main)
+    leaderboard = None
+    best_scores = {}
+    menu_tiles_by_set = {}
+
+    set_manifest = load_set_manifest(page)
+
+    def menu_info() -> str:
+        if set_manifest is None:
+            return "Brak manifestu zestawów - zakładam, że pliki 01-50.txt istnieją."
+        available_sets = [entry for entry in set_manifest.values() if entry["questions"]]
+        return (f"Dostępne zestawy: {len(available_sets)}/{SET_COUNT} "
+                f"({sum(entry['questions'] for entry in available_sets)} pytań).")
+
+    txt_menu_info = ft.Text(menu_info())
+
+    def menu_tile_tooltip(set_name: str) -> str:
+        tooltip = f"Zestaw {set_name}"
+        entry = set_manifest.get(set_name) if set_manifest else None
+        if set_manifest is not None and not (entry and entry["questions"]):
+            return f"{tooltip} - brak pliku"
+        if entry:
+            tooltip += f" - {entry['questions']} pytań"
+        best = best_scores.get(set_name)
+        if best is not None:
+            tooltip += f" - rekord: {best} zł"
+        return tooltip
+
+    def menu_tile_record(set_name: str) -> str:
+        """Rekord zestawu w skrócie na drugiej linii kafelka (np. 12.3k)."""
+        best = best_scores.get(set_name)
+        if best is None:
+            return ""
+        return f"{best / 1000:.1f}k" if best >= 1000 else str(best)
+
+    def refresh_menu_tile(set_name: str):
+        tile = menu_tiles_by_set.get(set_name)
+        if tile is None:
+            return None
+        tile.tooltip = menu_tile_tooltip(set_name)
+        tile.content.controls[1].value = menu_tile_record(set_name)
+        return tile
+
+    def category_indexes(category: str) -> list:
+        if set_manifest is None:
+            return list(dict(SET_CATEGORIES)[category])
+        return sorted(int(name) for name, entry in set_manifest.items() if entry["category"] == category)
+
     def create_menu_tile(index, bgcolor):
         filename = f"{index:02d}.txt"
-        
-        # Logika "na sztywno" - zakładamy, że pliki istnieją.
-        return ft.Button(
-            content=ft.Text(value=f"{index:02d}", size=12),
-            tooltip=f"Zestaw {index:02d}",
-            width=35,
-            height=35,
+        entry = set_manifest.get(f"{index:02d}") if set_manifest else None
+
+        # Bez manifestu - dawna logika "na sztywno" (zakładamy, że pliki istnieją)
+        available = set_manifest is None or bool(entry and entry["questions"])
+        tile = ft.Button(
+            key=f"set_{index:02d}",
+            # Numer zestawu i rekord gracza pod nim
+            content=ft.Column(
+                [
+                    ft.Text(value=f"{index:02d}", size=12),
+                    ft.Text(value=menu_tile_record(f"{index:02d}"), size=8, color="green_800"),
+                ],
+                spacing=0,
+                alignment=ft.MainAxisAlignment.CENTER,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            ),
+            tooltip=menu_tile_tooltip(f"{index:02d}"),
+            width=44,
+            height=44,
             on_click=lambda e, f=filename: start_game_session(e, f),
-            disabled=False,
+            disabled=not available,
             style=ft.ButtonStyle(
-                bgcolor=bgcolor
+                bgcolor=bgcolor,
+                padding=ft.padding.all(2)
             )
         )
+        menu_tiles_by_set[f"{index:02d}"] = tile
+        return tile
 
-    menu_tiles_standard = [create_menu_tile(i, "blue_grey_50") for i in range(1, 31)]
-    menu_tiles_popkultura = [create_menu_tile(i, "deep_purple_50") for i in range(31, 41)]
-    menu_tiles_popkultura_muzyka = [create_menu_tile(i, "amber_50") for i in range(41, 51)]
+    menu_tiles_standard = [create_menu_tile(i, "blue_grey_50") for i in category_indexes("standard")]
+    menu_tiles_popkultura = [create_menu_tile(i, "deep_purple_50") for i in category_indexes("popkultura")]
+    menu_tiles_popkultura_muzyka = [create_menu_tile(i, "amber_50") for i in category_indexes("muzyka")]
+
+    def create_bank_tile(path):
+        return ft.Button(
+            key=f"bank_{os.path.basename(path)}",
+            text=os.path.splitext(os.path.basename(path))[0],
+            tooltip=path,
+            on_click=lambda e, f=path: start_game_session(e, f),
+            style=ft.ButtonStyle(
+                bgcolor="teal_50"
+            )
+        )
+
+    menu_tiles_banks = [create_bank_tile(path) for path in find_question_banks()]
 
     main_menu_view = ft.Column(
         [
             ft.Text("Wybierz zestaw pytań:", size=24, weight=ft.FontWeight.BOLD),
-            ft.Text(f"Zakładam, że pliki 01-50.txt istnieją."),
+            txt_menu_info,
+            sw_timed_mode,
+            sw_typeahead_mode,
             main_menu_feedback,
             ft.Divider(height=20),
             ft.Row(menu_tiles_standard[0:10], alignment=ft.MainAxisAlignment.CENTER, wrap=True),
@@ -416,12 +947,18 @@ def main(page: ft.Page):
             ft.Text("Pytania popkultura i muzyka boost:", size=24, weight=ft.FontWeight.BOLD),
             ft.Divider(height=20),
             ft.Row(menu_tiles_popkultura_muzyka, alignment=ft.MainAxisAlignment.CENTER, wrap=True),
+
+            ft.Divider(height=30, visible=bool(menu_tiles_banks)),
+            ft.Text("Własne banki pytań:", size=24, weight=ft.FontWeight.BOLD, visible=bool(menu_tiles_banks)),
+            ft.Row(menu_tiles_banks, alignment=ft.MainAxisAlignment.CENTER, wrap=True, visible=bool(menu_tiles_banks)),
         ],
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
         spacing=10,
         visible=True
     )
 
+    profile.mark("menu")
+
     # --- Funkcje Logiki Gry ---
 
     def update_money_display():
@@ -459,7 +996,22 @@ def main(page: ft.Page):
         if page:
             page.update(txt_question_counter)
 
+    def save_checkpoint():
+        """
+        Planuje zapis stanu gry po akcji gracza. Poza fazami gry zapis jest
+        usuwany, więc po ponownym uruchomieniu aplikacja startuje z menu.
+        """
+        if game_state["phase"] in RESUMABLE_PHASES:
+            feedback = (txt_feedback.value, txt_feedback.color)
+            snapshot_writer.put(SNAPSHOT_STATE_KEY, encode_snapshot(game_state, feedback))
+        else:
+            snapshot_writer.put(SNAPSHOT_STATE_KEY, None)
+
     def show_game_over(message: str):
+        TIMERS.cancel(timer_key)
+        game_state["phase"] = "over"
+        save_checkpoint()
+        snapshot_writer.put(SNAPSHOT_SET_KEY, None)
         btn_hint_5050.disabled = True
         btn_buy_abcd.disabled = True
         btn_next.disabled = True
@@ -472,7 +1024,7 @@ def main(page: ft.Page):
 
         if page:
             page.update(btn_hint_5050, btn_buy_abcd, btn_next, txt_answer_field, btn_submit_answer, answers_container,
-                        bidding_container)
+                        bidding_container, txt_timer)
 
         dlg = ft.AlertDialog(
             modal=True,
@@ -490,31 +1042,60 @@ def main(page: ft.Page):
         if page:
             page.update()
 
+    def record_final_score():
+        """Zapisuje wynik ukończonego zestawu w rankingu. Zwraca miejsce w rankingu zestawu."""
+        if leaderboard is None:
+            return None
+        set_name = game_state["set_name"]
+        score = game_state["money"]
+        try:
+            leaderboard.record(set_name, score)
+            rank = leaderboard.store.rank(score, set_name)
+        except Exception as e:
+            print(f"Ranking: nie można zapisać wyniku. Błąd: {e}")
+            return None
+
+        if score > best_scores.get(set_name, -1):
+            best_scores[set_name] = score
+            refresh_menu_tile(set_name)
+
+        # Wysyłka paczki wyników (z ponowieniami) poza wątkiem obsługi kliknięcia
+        if leaderboard.backend is not None:
+            page.run_thread(leaderboard.flush)
+        return rank
+
     def check_game_over(minimum_needed: int, message: str):
         if game_state["money"] < minimum_needed:
             show_game_over(message)
             return True
         return False
 
+    @with_session_lock
     def check_answer(user_input: str):
+        # Ochrona przed podwójną oceną (np. kliknięcie w chwili upływu czasu)
+        if game_state["phase"] != "answering" or game_state["question_answered"]:
+            return
+        game_state["question_answered"] = True
+        TIMERS.cancel(timer_key)
+
         txt_answer_field.disabled = True
         btn_submit_answer.disabled = True
         btn_hint_5050.disabled = True
         btn_buy_abcd.disabled = True
 
         toggle_answer_buttons(disabled=True)
+        show_suggestions([])
 
         current_q = game_state["active_question_set"][game_state["current_question_index"]]
-        correct_text = current_q["correct"]
+        correct_text = current_q.correct
 
         pot_won = game_state["main_pot"]
 
-        norm_user = normalize_answer(user_input)
-        norm_correct = normalize_answer(correct_text)
-
-        similarity = fuzz.ratio(norm_user, norm_correct)
-
-        is_correct = similarity >= 80
+        # Potok dopasowań (dokładne, nazwisko, zbiór słów, fuzz.ratio) - zob. answer_matching
+        is_correct, similarity, _ = get_matcher(correct_text, current_q.question).match(user_input)
+        if game_state["abcd_unlocked"] and correct_text in current_q.answers:
+            # Wybraną opcję ABCD oceniamy dokładnie - podobne opcje ("Nefron"/"Neuron") to różne odpowiedzi
+            is_correct = user_input == correct_text
 
         if is_correct:
             game_state["money"] += pot_won
@@ -556,9 +1137,71 @@ def main(page: ft.Page):
         btn_next.visible = True
         btn_back_to_menu.visible = True
 
+        game_state["phase"] = "answered"
+
         if page:
             page.update(txt_feedback, btn_next, answers_container, txt_answer_field, btn_submit_answer, btn_hint_5050,
-                        btn_buy_abcd, btn_back_to_menu)
+                        btn_buy_abcd, btn_back_to_menu, txt_timer)
+
+        save_checkpoint()
+
+    @with_session_lock
+    def handle_answer_timeout():
+        if game_state["phase"] != "answering" or game_state["question_answered"]:
+            return
+        check_answer("")
+        txt_feedback.value = f"CZAS MINĄŁ! {txt_feedback.value}"
+        if page:
+            page.update(txt_feedback)
+        save_checkpoint()
+
+    @with_session_lock
+    def handle_bidding_timeout():
+        # Licytacja mogła zostać zakończona ręcznie tuż przed upływem czasu
+        if game_state["phase"] != "bidding":
+            return
+        start_answering_and_load_question(None)
+
+    def show_suggestions(suggestions: list):
+        if suggestions == typeahead["shown"]:
+            return
+        typeahead["shown"] = suggestions
+        suggestions_row.controls = [
+            ft.TextButton(text=s, data=s, on_click=pick_suggestion) for s in suggestions
+        ]
+        suggestions_row.visible = bool(suggestions)
+        if page:
+            page.update(suggestions_row)
+
+    def handle_answer_change(e):
+        # Każdy znak tylko zapamiętuje czas zmiany - podpowiedzi odświeża
+        # jedno zadanie na sesję, gdy gracz przestanie pisać na TYPEAHEAD_DEBOUNCE s
+        if not game_state["typeahead_mode"] or typeahead["trie"] is None:
+            return
+        typeahead["last_change"] = time.monotonic()
+        if typeahead["pending"]:
+            return
+        typeahead["pending"] = True
+        page.run_task(refresh_suggestions)
+
+    async def refresh_suggestions():
+        while True:
+            wait = typeahead["last_change"] + TYPEAHEAD_DEBOUNCE - time.monotonic()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        typeahead["pending"] = False
+
+        if txt_answer_field.disabled or not txt_answer_field.visible:
+            show_suggestions([])
+            return
+        show_suggestions(typeahead["trie"].suggest(txt_answer_field.value or ""))
+
+    def pick_suggestion(e):
+        txt_answer_field.value = e.control.data
+        show_suggestions([])
+        if page:
+            page.update(txt_answer_field)
 
     def handle_submit_answer(e):
         user_text = txt_answer_field.value
@@ -568,7 +1211,11 @@ def main(page: ft.Page):
         selected_answer = e.control.data
         check_answer(selected_answer)
 
+    @with_session_lock
     def buy_hint_5050(e):
+        # Podpowiedź kupiona w chwili upływu czasu nie zmienia już ocenionego pytania
+        if game_state["phase"] != "answering":
+            return
         if not game_state["abcd_unlocked"]:
             txt_feedback.value = "Podpowiedź 50/50 działa tylko z opcjami ABCD!"
             txt_feedback.color = "orange"
@@ -592,20 +1239,25 @@ def main(page: ft.Page):
         update_spent_display()
 
         current_q = game_state["active_question_set"][game_state["current_question_index"]]
-        correct_answer = current_q["correct"]
+        correct_answer = current_q.correct
 
-        wrong_answers = [ans for ans in current_q["answers"] if ans != correct_answer]
+        wrong_answers = [ans for ans in current_q.answers if ans != correct_answer]
         random.shuffle(wrong_answers)
-        to_remove = wrong_answers[:2]
+        game_state["hint_removed"] = wrong_answers[:2]
 
         for btn in answers_container.controls:
-            if btn.data in to_remove:
+            if btn.data in game_state["hint_removed"]:
                 btn.disabled = True
 
         if page:
             page.update(btn_hint_5050, txt_feedback, answers_container)
 
+        save_checkpoint()
+
+    @with_session_lock
     def buy_abcd_options(e):
+        if game_state["phase"] != "answering":
+            return
         cost = random.randint(1000, 3000)
 
         if game_state["money"] < cost:
@@ -620,22 +1272,33 @@ def main(page: ft.Page):
         update_money_display()
         update_spent_display()
 
+        txt_feedback.value = f"Kupiono opcje ABCD za {cost} zł."
+        txt_feedback.color = "blue"
+
+        q_data = game_state["active_question_set"][game_state["current_question_index"]]
+        shuffled_answers = list(q_data.answers)
+        random.shuffle(shuffled_answers)
+        game_state["abcd_order"] = shuffled_answers
+
+        show_abcd_ui()
+        btn_hint_5050.disabled = False
+
+        if page:
+            page.update(txt_answer_field, btn_submit_answer, answers_container, btn_buy_abcd, btn_hint_5050,
+                        txt_feedback)
+
+        save_checkpoint()
+
+    def show_abcd_ui():
         txt_answer_field.visible = False
         btn_submit_answer.visible = False
+        show_suggestions([])
 
         answers_container.visible = True
         btn_buy_abcd.disabled = True
-        btn_hint_5050.disabled = False
 
-        txt_feedback.value = f"Kupiono opcje ABCD za {cost} zł."
-        txt_feedback.color = "blue"
-
-        q_data = game_state["active_question_set"][game_state["current_question_index"]]
         answers_container.controls.clear()
-        shuffled_answers = q_data["answers"].copy()
-        random.shuffle(shuffled_answers)
-
-        for answer in shuffled_answers:
+        for answer in game_state["abcd_order"]:
             answers_container.controls.append(
                 ft.Button(
                     text=answer,
@@ -647,10 +1310,6 @@ def main(page: ft.Page):
                 )
             )
 
-        if page:
-            page.update(txt_answer_field, btn_submit_answer, answers_container, btn_buy_abcd, btn_hint_5050,
-                        txt_feedback)
-
     def toggle_answer_buttons(disabled: bool):
         for btn in answers_container.controls:
             btn.disabled = disabled
@@ -661,18 +1320,55 @@ def main(page: ft.Page):
         if page:
             page.update(answers_container)
 
+    @with_session_lock
     def start_answering_and_load_question(e):
+        # Drugie kliknięcie albo upływ czasu licytacji po jej zakończeniu
+        if game_state["phase"] != "bidding":
+            return
+        TIMERS.cancel(timer_key)
         game_state["current_question_index"] += 1
+        # Uszkodzone rekordy banków czytanych na żądanie (SourceQuestions) pomijamy
+        while (game_state["current_question_index"] < game_state["total_questions"]
+               and game_state["active_question_set"][game_state["current_question_index"]] is None):
+            game_state["current_question_index"] += 1
 
         if game_state["current_question_index"] >= game_state["total_questions"]:
-            show_game_over(
-                f"Gratulacje! Ukończyłeś zestaw {game_state['set_name']} z wynikiem {game_state['money']} zł!")
+            message = f"Gratulacje! Ukończyłeś zestaw {game_state['set_name']} z wynikiem {game_state['money']} zł!"
+            rank = record_final_score()
+            if rank is not None:
+                message += f"\nMiejsce w rankingu zestawu: {rank}."
+            show_game_over(message)
             return
 
+        game_state["phase"] = "answering"
+        game_state["abcd_unlocked"] = False
+        game_state["abcd_order"] = []
+        game_state["hint_removed"] = []
+        game_state["question_answered"] = False
+
+        show_question_ui()
+
+        txt_feedback.value = "Odpowiedz na pytanie:"
+        txt_feedback.color = "black"
+
+        if page:
+            page.update(bidding_container, answer_ui_container, txt_answer_field,
+                        btn_submit_answer, btn_buy_abcd, btn_hint_5050, txt_feedback,
+                        answers_container, txt_question, txt_bonus_pot, txt_timer)
+
+        if game_state["timed_mode"]:
+            TIMERS.start(timer_key, page, ANSWER_TIME_LIMIT, txt_timer, handle_answer_timeout,
+                         label="Czas na odpowiedź")
+
+        save_checkpoint()
+
+    def show_question_ui():
         update_question_counter()
 
         q_data = game_state["active_question_set"][game_state["current_question_index"]]
-        txt_question.value = q_data["question"]
+        txt_question.value = q_data.question
+        # Matcher odpowiedzi budujemy przy wyświetleniu pytania, a nie przy ocenie
+        get_matcher(q_data.correct, q_data.question)
         txt_question.visible = True
 
         bidding_container.visible = False
@@ -682,12 +1378,13 @@ def main(page: ft.Page):
         txt_answer_field.visible = True
         txt_answer_field.disabled = False
         txt_answer_field.value = ""
+        txt_answer_field.on_change = handle_answer_change
+        show_suggestions([])
         btn_submit_answer.visible = True
         btn_submit_answer.disabled = False
 
         btn_buy_abcd.disabled = False
 
-        game_state["abcd_unlocked"] = False
         answers_container.visible = False
         answers_container.controls.clear()
         toggle_answer_buttons(disabled=False)
@@ -696,20 +1393,15 @@ def main(page: ft.Page):
 
         btn_hint_5050.disabled = True
 
-        txt_feedback.value = "Odpowiedz na pytanie:"
-        txt_feedback.color = "black"
-
         btn_submit_answer.on_click = handle_submit_answer
         btn_hint_5050.on_click = buy_hint_5050
         btn_buy_abcd.on_click = buy_abcd_options
         btn_next.on_click = start_bidding_phase
 
-        if page:
-            page.update(bidding_container, answer_ui_container, txt_answer_field,
-                        btn_submit_answer, btn_buy_abcd, btn_hint_5050, txt_feedback,
-                        answers_container, txt_question, txt_bonus_pot)
-
+    @with_session_lock
     def bid_100(e):
+        if game_state["phase"] != "bidding":
+            return
         bid_amount = 100
         current_bid = game_state["current_bid_amount"]
         max_bid = game_state["max_bid_per_round"]
@@ -759,6 +1451,9 @@ def main(page: ft.Page):
         if page:
             page.update(btn_bid_100, txt_feedback)
 
+        save_checkpoint()
+
+    @with_session_lock
     def start_bidding_phase(e=None):
         stake = game_state["base_stake"]
 
@@ -773,9 +1468,26 @@ def main(page: ft.Page):
         update_pot_display()
         update_bonus_display()
 
+        game_state["phase"] = "bidding"
+
         txt_feedback.value = f"Stawka {stake} zł dodana do puli. Licytuj!"
         txt_feedback.color = "black"
 
+        show_bidding_ui()
+
+        if page:
+            page.update(
+                txt_question, answer_ui_container, txt_feedback, btn_hint_5050,
+                btn_buy_abcd, btn_next, bidding_container, txt_bonus_pot, btn_back_to_menu
+            )
+
+        if game_state["timed_mode"]:
+            TIMERS.start(timer_key, page, BIDDING_TIME_LIMIT, txt_timer, handle_bidding_timeout,
+                         label="Czas na licytację")
+
+        save_checkpoint()
+
+    def show_bidding_ui():
         txt_question.visible = False
         answer_ui_container.visible = False
         btn_next.visible = False
@@ -785,20 +1497,18 @@ def main(page: ft.Page):
 
         bidding_container.visible = True
         txt_bonus_pot.visible = True
-        btn_bid_100.disabled = False
-        btn_bid_100.text = "Licytuj +100 zł (Suma: 0 zł)"
+        btn_bid_100.disabled = (
+            game_state["money"] < 100
+            or game_state["current_bid_amount"] >= game_state["max_bid_per_round"]
+        )
+        btn_bid_100.text = f"Licytuj +100 zł (Suma: {game_state['current_bid_amount']} zł)"
         btn_start_answering.disabled = False
 
         btn_bid_100.on_click = bid_100
         btn_start_answering.on_click = start_answering_and_load_question
 
-        if page:
-            page.update(
-                txt_question, answer_ui_container, txt_feedback, btn_hint_5050,
-                btn_buy_abcd, btn_next, bidding_container, txt_bonus_pot, btn_back_to_menu
-            )
-
     def reset_game_state():
+        TIMERS.cancel(timer_key)
         game_state["money"] = 10000
         game_state["current_question_index"] = -1
         game_state["main_pot"] = 0
@@ -830,10 +1540,15 @@ def main(page: ft.Page):
             page.update(
                 btn_next, txt_question, txt_feedback,
                 bidding_container, answer_ui_container, btn_hint_5050,
-                btn_buy_abcd, btn_back_to_menu
+                btn_buy_abcd, btn_back_to_menu, txt_timer
             )
 
+    @with_session_lock
     def go_to_main_menu(e):
+        TIMERS.cancel(timer_key)
+        game_state["phase"] = "menu"
+        save_checkpoint()
+        snapshot_writer.put(SNAPSHOT_SET_KEY, None)
         game_view.visible = False
         main_menu_view.visible = True
         main_menu_feedback.visible = False
@@ -847,6 +1562,8 @@ def main(page: ft.Page):
     def restart_current_set(e):
         if hasattr(page, 'dialog') and page.dialog:
             page.dialog.open = False
+        # Koniec gry usunął zapis zestawu - nowa gra tym samym zestawem zapisuje go ponownie
+        snapshot_writer.put(SNAPSHOT_SET_KEY, game_state["set_snapshot"])
         reset_game_state()
         start_bidding_phase()
         if page:
@@ -866,7 +1583,11 @@ def main(page: ft.Page):
 
         game_state["active_question_set"] = loaded_questions
         game_state["total_questions"] = len(loaded_questions)
-        game_state["set_name"] = set_filename.replace(".txt", "")
+        game_state["set_name"] = os.path.splitext(os.path.basename(set_filename))[0]
+
+        # Zestaw zapisujemy raz na grę - punkty kontrolne zawierają już tylko stan
+        game_state["set_snapshot"] = encode_question_set(game_state["set_name"], loaded_questions, set_filename)
+        snapshot_writer.put(SNAPSHOT_SET_KEY, game_state["set_snapshot"])
 
         reset_game_state()
 
@@ -879,17 +1600,127 @@ def main(page: ft.Page):
         if page:
             page.update(main_menu_view, game_view, main_menu_feedback)
 
+    def resume_saved_game():
+        """
+        Przywraca przerwaną grę z page.client_storage prosto do zapisanej fazy,
+        bez ponownego parsowania pliku zestawu. Mierzy i loguje czas wznowienia.
+        """
+        started = time.perf_counter()
+        try:
+            snapshot = decode_snapshot(page.client_storage.get(SNAPSHOT_STATE_KEY))
+            if snapshot is None:
+                return False
+            set_name = snapshot["state"]["set_name"]
+            set_snapshot = page.client_storage.get(SNAPSHOT_SET_KEY)
+            questions = decode_question_set(set_snapshot, set_name,
+                                            lambda filename: parse_question_file(page, filename))
+        except Exception as e:
+            print(f"Wznowienie: nie można odczytać zapisu. Błąd: {e}")
+            return False
+
+        if not questions:
+            print(f"Wznowienie: brak zapisanego zestawu {set_name}.")
+            return False
+
+        game_state.update(snapshot["state"])
+        game_state["active_question_set"] = questions
+        game_state["total_questions"] = len(questions)
+        game_state["set_snapshot"] = set_snapshot
+        sw_timed_mode.value = game_state["timed_mode"]
+
+        main_menu_view.visible = False
+        game_view.visible = True
+        update_money_display()
+        update_spent_display()
+        update_pot_display()
+        update_bonus_display()
+        update_question_counter()
+
+        phase = game_state["phase"]
+        if phase == "bidding":
+            show_bidding_ui()
+        else:
+            show_question_ui()
+            if game_state["abcd_unlocked"]:
+                show_abcd_ui()
+                btn_hint_5050.disabled = bool(game_state["hint_removed"])
+                for btn in answers_container.controls:
+                    if btn.data in game_state["hint_removed"]:
+                        btn.disabled = True
+            if phase == "answered":
+                txt_answer_field.disabled = True
+                btn_submit_answer.disabled = True
+                btn_buy_abcd.disabled = True
+                btn_hint_5050.disabled = True
+                toggle_answer_buttons(disabled=True)
+                btn_next.visible = True
+                btn_back_to_menu.visible = True
+
+        txt_feedback.value, txt_feedback.color = snapshot["feedback"]
+
+        if page:
+            page.update()
+
+        # Licznik trybu na czas startuje od nowa - czas sprzed zamknięcia aplikacji nie jest liczony
+        if game_state["timed_mode"] and phase == "bidding":
+            TIMERS.start(timer_key, page, BIDDING_TIME_LIMIT, txt_timer, handle_bidding_timeout,
+                         label="Czas na licytację")
+        elif game_state["timed_mode"] and phase == "answering":
+            TIMERS.start(timer_key, page, ANSWER_TIME_LIMIT, txt_timer, handle_answer_timeout,
+                         label="Czas na odpowiedź")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"Wznowienie: zestaw {set_name}, faza '{phase}', czas wznowienia {elapsed_ms:.1f} ms")
+        return True
+
     # --- Układ Strony (Layout) ---
     btn_back_to_menu.on_click = go_to_main_menu
     btn_next.on_click = start_bidding_phase
 
-    page.add(
-        main_menu_view,
-        game_view
-    )
+    # Najpierw samo menu - pierwsza klatka nie czeka na widok gry, ranking ani wznowienie
+    page.add(main_menu_view)
+    profile.interactive()
+
+    page.add(game_view)
+    profile.mark("widok gry")
+
+    leaderboard = load_leaderboard()
+    if leaderboard is not None:
+        best_scores.update(leaderboard.store.best_scores())
+        tiles = [tile for tile in map(refresh_menu_tile, best_scores) if tile is not None]
+        if page and tiles:
+            page.update(*tiles)
+    profile.mark("ranking")
+
+    resume_saved_game()
+    profile.mark("wznowienie gry")
+
+    # Wyniki, których nie udało się wysłać w poprzednich uruchomieniach
+    if leaderboard is not None and leaderboard.backend is not None:
+        page.run_thread(leaderboard.flush)
+
+    def refresh_updated_sets(set_names):
+        """Pobrany zestaw od razu w menu: włączony kafelek, nowa liczba pytań."""
+        tiles = []
+        for set_name in set_names:
+            tile = refresh_menu_tile(set_name)
+            if tile is not None:
+                entry = set_manifest.get(set_name) if set_manifest else None
+                tile.disabled = not (entry and entry["questions"])
+                tiles.append(tile)
+        txt_menu_info.value = menu_info()
+        if page:
+            page.update(txt_menu_info, *tiles)
+
+    # Nowe wersje zestawów z serwera treści (bez przebudowy APK)
+    if get_content_updater(BUNDLED_CONTENT_URL) is not None:
+        page.run_thread(check_content_updates, page, refresh_updated_sets)
+
+    # thefuzz w tle, żeby pierwsza ocena odpowiedzi nie czekała na import
+    page.run_thread(load_fuzz)
 
-    if page:
-        page.update()
+    if print_profile:
+        print(profile.report(f"{page.platform}{', web' if page.web else ''}"))
 
 
 # Uruchomienie aplikacji Flet
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import sys
+
+from question_sources import parse_text_questions
+
+# --- STAŁE: Manifest zestawów ---
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+SET_COUNT = 50
+CONTENT_URL_FIELD = "content_url"  # adres serwera treści wbudowany w aplikację (opcjonalny)
+
+# Kategorie zestawów wg numeru (tak jak sekcje menu)
+SET_CATEGORIES = (
+    ("standard", range(1, 31)),
+    ("popkultura", range(31, 41)),
+    ("muzyka", range(41, 51)),
+)
+
+
+def set_category(index: int) -> str:
+    for category, indexes in SET_CATEGORIES:
+        if index in indexes:
+            return category
+    return "standard"
+
+
+def describe_set(path: str, index: int) -> dict:
+    """Wpis manifestu jednego zestawu (plik, kategoria, liczba pytań, sha256, rozmiar)."""
+    entry = {
+        "set": f"{index:02d}",
+        "file": os.path.basename(path),
+        "category": set_category(index),
+        "questions": 0,
+        "sha256": None,
+        "bytes": 0,
+    }
+    if not os.path.exists(path):
+        return entry
+    with open(path, "rb") as f:
+        data = f.read()
+    entry["questions"] = len(parse_text_questions(data.decode("utf-8-sig")))
+    entry["sha256"] = hashlib.sha256(data).hexdigest()
+    entry["bytes"] = len(data)
+    return entry
+
+
+def build_manifest(assets_dir: str = "assets", content_url: str | None = None) -> dict:
+    """
+    Manifest wszystkich zestawów 01-50. Brakujący plik dostaje wpis
+    z "questions": 0, więc menu może wyłączyć jego kafelek bez prób otwarcia.
+    `content_url` trafia do manifestu w assets - APK nie ma zmiennych środowiskowych,
+    więc adres serwera aktualizacji musi być wbudowany.
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "sets": [
+            describe_set(os.path.join(assets_dir, f"{index:02d}.txt"), index)
+            for index in range(1, SET_COUNT + 1)
+        ],
+    }
+    if content_url:
+        manifest[CONTENT_URL_FIELD] = content_url
+    return manifest
+
+
+def write_manifest(assets_dir: str = "assets", content_url: str | None = None) -> dict:
+    manifest = build_manifest(assets_dir, content_url)
+    with open(os.path.join(assets_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    return manifest
+
+
+def parse_manifest(content: str) -> dict | None:
+    """Zestawy z manifestu: {"01": wpis, ...}. None - brak lub nieznana wersja manifestu."""
+    try:
+        manifest = json.loads(content)
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return {entry["set"]: entry for entry in manifest["sets"]}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def parse_content_url(content: str) -> str | None:
+    """Adres serwera treści zapisany w manifeście (None - brak)."""
+    try:
+        return json.loads(content).get(CONTENT_URL_FIELD) or None
+    except (ValueError, AttributeError):
+        return None
+
+
+if __name__ == "__main__":
+    # Generowanie manifestu (przed buildem): python manifest.py [katalog_assets] [adres_serwera_treści]
+    assets_dir = sys.argv[1] if len(sys.argv) > 1 else "assets"
+    manifest = write_manifest(assets_dir, sys.argv[2] if len(sys.argv) > 2 else None)
+    available = [entry for entry in manifest["sets"] if entry["questions"]]
+    print(f"Manifest: {len(available)}/{SET_COUNT} zestawów, "
+          f"{sum(entry['questions'] for entry in available)} pytań -> {os.path.join(assets_dir, MANIFEST_FILE)}")
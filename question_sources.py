@@ -0,0 +1,576 @@
+import csv
+import io
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from dataclasses import dataclass
+
+# --- STAŁE: Źródła pytań ---
+ANSWER_LETTERS = ("A", "B", "C", "D")
+CSV_COLUMNS = ("question", "correct", "a", "b", "c", "d")
+SQLITE_BATCH_SIZE = 1000
+
+_BLOCK_START = re.compile(rb"^\d+\.\s")
+_BLOCK_SPLIT = re.compile(r"\n(?=\d+\.)")
+_BLOCK = re.compile(
+    r"^\d+\.\s(.*?)\n"
+    r"prawid(?:l|ł)owa\s+odpowied(?:z|ź)\s*=\s*(.*?)\n"
+    r"odpowied(?:z|ź)\s+abcd\s*=\s*A\s*=\s*(.*)$",
+    re.DOTALL | re.IGNORECASE
+)
+_OPTION_MARKS = {letter: re.compile(rf",\s*{letter}\s*=\s*") for letter in ANSWER_LETTERS[1:]}
+
+
+@dataclass(frozen=True, slots=True)
+class Question:
+    """
+    Zwięzły rekord pytania: __slots__ zamiast słownika i krotka zamiast listy.
+    Rekordy są niezmienne, więc jeden obiekt może być współdzielony przez
+    wszystkie sesje, które grają tym samym zestawem.
+    """
+    question: str
+    correct: str
+    answers: tuple
+
+    def as_dict(self) -> dict:
+        return {"question": self.question, "correct": self.correct, "answers": list(self.answers)}
+
+
+def make_question(question: str, correct: str, answers) -> Question:
+    """
+    Tworzy rekord pytania. Teksty odpowiedzi są internowane, więc te same
+    opcje ("Juliusz Słowacki", stolice...) w wielu zestawach to jeden obiekt str.
+    """
+    return Question(
+        question,
+        sys.intern(correct),
+        tuple(sys.intern(answer) for answer in answers),
+    )
+
+
+def split_abcd(options: str, correct: str) -> list | None:
+    """
+    Dzieli "Allel, B = Chromosom, C = Genom, D = Fenotyp" (tekst po "A =") na 4 opcje.
+
+    Odpowiedź może sama zawierać np. ", B = ", więc sprawdzane są wszystkie
+    kolejne pozycje znaczników B, C, D i wybierany jest podział, w którym
+    prawidłowa odpowiedź jest jedną z opcji (lub pierwszy możliwy podział).
+    """
+    positions = {
+        letter: [(m.start(), m.end()) for m in mark.finditer(options)]
+        for letter, mark in _OPTION_MARKS.items()
+    }
+    fallback = None
+    for b, c, d in itertools.product(positions["B"], positions["C"], positions["D"]):
+        if not (b[1] <= c[0] and c[1] <= d[0]):
+            continue
+        answers = [
+            options[:b[0]].strip(),
+            options[b[1]:c[0]].strip(),
+            options[c[1]:d[0]].strip(),
+            options[d[1]:].strip(),
+        ]
+        if correct in answers:
+            return answers
+        if fallback is None:
+            fallback = answers
+    return fallback
+
+
+def parse_text_block(block: str) -> Question | None:
+    """Parsuje jeden blok pytania w formacie tekstowym (3 linie). None - blok niepoprawny."""
+    block = block.replace("\r\n", "\n").strip()
+    if not block:
+        return None
+    match = _BLOCK.match(block)
+    if not match:
+        print(f"Blok nie pasuje do wzorca: {block[:50]}...")
+        return None
+    correct = match.group(2).strip()
+    answers = split_abcd(match.group(3).strip(), correct)
+    if answers is None:
+        print(f"Błąd parsowania bloku: {block[:50]}... Błąd: brak opcji B, C, D")
+        return None
+    return make_question(match.group(1).strip(), correct, answers)
+
+
+def parse_text_questions(content: str) -> list:
+    """Parsuje całą zawartość pliku .txt (format "prawidłowa odpowiedz = ...")."""
+    parsed_questions = []
+    for block in _BLOCK_SPLIT.split(content.replace("\r\n", "\n")):
+        question = parse_text_block(block)
+        if question:
+            parsed_questions.append(question)
+    return parsed_questions
+
+
+class QuestionSource(ABC):
+    """
+    Wspólny interfejs źródeł pytań: len(), get(i) (dostęp swobodny),
+    iteracja strumieniowa i close(). Pytania to rekordy Question.
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def get(self, index: int) -> Question | None:
+        ...
+
+    def __iter__(self):
+        for index in range(len(self)):
+            question = self.get(index)
+            if question:
+                yield question
+
+    def load_all(self) -> list:
+        return list(self)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def file_fingerprint(path: str) -> str:
+    """Rozmiar i czas modyfikacji pliku - tanie wykrycie podmiany banku bez czytania go."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class SourceQuestions:
+    """
+    Zestaw pytań gry czytany ze źródła na żądanie: len() i [i] zamiast listy,
+    więc duży bank nie jest wczytywany w całości. Jedno otwarte źródło dzielą
+    wszystkie sesje, dlatego odczyty są chronione blokadą. Uszkodzony rekord
+    daje None (gra go pomija).
+    """
+
+    def __init__(self, source: QuestionSource, path: str):
+        self.source = source
+        self.path = path
+        self.fingerprint = file_fingerprint(path)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._length = len(source)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> Question | None:
+        with self._lock:
+            try:
+                return self.source.get(index)
+            except Exception as e:
+                # Plik zmieniony lub uszkodzony w trakcie gry - rekord traktujemy jak uszkodzony
+                print(f"Źródło pytań: nie można odczytać pytania {index} z {self.path}. Błąd: {e}")
+                return None
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+
+class _OffsetIndexedSource(QuestionSource):
+    """
+    Źródło plikowe z indeksem przesunięć rekordów: jeden przebieg po pliku
+    buduje tablicę początków rekordów, a get(i) czyta tylko rekord i.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._offsets = None
+
+    @abstractmethod
+    def _record_starts(self):
+        """Zwraca kolejne przesunięcia początków rekordów (i na końcu rozmiar pliku)."""
+
+    @abstractmethod
+    def _parse_record(self, data: bytes) -> Question | None:
+        ...
+
+    def _index(self) -> array:
+        if self._offsets is None:
+            self._offsets = array("q", self._record_starts())
+        return self._offsets
+
+    def __len__(self) -> int:
+        return max(len(self._index()) - 1, 0)
+
+    def get(self, index: int) -> Question | None:
+        offsets = self._index()
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        self._file.seek(offsets[index])
+        return self._parse_record(self._file.read(offsets[index + 1] - offsets[index]))
+
+    def __iter__(self):
+        # Przy pełnym przebiegu nie potrzebujemy seek() dla każdego rekordu
+        offsets = self._index()
+        self._file.seek(offsets[0] if offsets else 0)
+        for start, end in zip(offsets, offsets[1:]):
+            question = self._parse_record(self._file.read(end - start))
+            if question:
+                yield question
+
+    def _scan_lines(self):
+        self._file.seek(0)
+        offset = 0
+        for line in self._file:
+            yield offset, line
+            offset += len(line)
+        self._size = offset
+
+    def close(self):
+        self._file.close()
+
+
+class TextQuestionSource(_OffsetIndexedSource):
+    """Pliki .txt w formacie gry (blok pytania zaczyna się od "NN. ")."""
+
+    def _record_starts(self):
+        for offset, line in self._scan_lines():
+            if _BLOCK_START.match(line.lstrip(b"\xef\xbb\xbf")):
+                yield offset
+        yield self._size
+
+    def _parse_record(self, data: bytes) -> Question | None:
+        return parse_text_block(data.decode("utf-8-sig"))
+
+
+class JsonLinesQuestionSource(_OffsetIndexedSource):
+    """Pliki .jsonl - jedno pytanie (obiekt JSON) w każdej linii."""
+
+    def _record_starts(self):
+        for offset, line in self._scan_lines():
+            if line.strip():
+                yield offset
+        yield self._size
+
+    def _parse_record(self, data: bytes) -> Question | None:
+        try:
+            record = json.loads(data)
+            return make_question(record["question"], record["correct"], record["answers"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"JSONL: niepoprawny rekord: {data[:50]!r}... Błąd: {e}")
+            return None
+
+
+class CsvQuestionSource(_OffsetIndexedSource):
+    """Pliki .csv z nagłówkiem question,correct,a,b,c,d (pola mogą zawierać nowe linie)."""
+
+    def _record_starts(self):
+        quotes = 0
+        first = True
+        for offset, line in self._scan_lines():
+            if quotes % 2 == 0:
+                # Początek rekordu (poza polem w cudzysłowie); pomijamy nagłówek
+                if not first and line.strip():
+                    yield offset
+                first = False
+            quotes += line.count(b'"')
+        yield self._size
+
+    def _parse_record(self, data: bytes) -> Question | None:
+        try:
+            row = next(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+            if len(row) < len(CSV_COLUMNS):
+                raise IndexError(f"{len(row)} kolumn zamiast {len(CSV_COLUMNS)}")
+            return make_question(row[0].strip(), row[1].strip(), [a.strip() for a in row[2:6]])
+        except (StopIteration, IndexError, csv.Error) as e:
+            print(f"CSV: niepoprawny rekord: {data[:50]!r}... Błąd: {e}")
+            return None
+
+
+class JsonQuestionSource(QuestionSource):
+    """Pliki .json - tablica pytań (wczytywana w całości; dla dużych banków użyj .jsonl)."""
+
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self._questions = [make_question(r["question"], r["correct"], r["answers"]) for r in records]
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def get(self, index: int) -> Question | None:
+        return self._questions[index]
+
+
+class SqliteQuestionSource(QuestionSource):
+    """
+    Bazy .sqlite3 z tabelą questions. Opcjonalny `set_name` ogranicza źródło
+    do jednego zestawu. Pierwsze użycie wczytuje tablicę identyfikatorów
+    rekordów (kolejność id albo position), a get(i) czyta jeden wiersz po id -
+    luki w numeracji (usunięte pytania) nie przesuwają indeksów.
+    """
+
+    def __init__(self, path: str, set_name: str | None = None):
+        import sqlite3  # tylko dla źródeł .sqlite3 (w Pyodide modułu może nie być)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self.set_name = set_name
+        self._ids = None
+
+    def _index(self) -> array:
+        if self._ids is None:
+            if self.set_name is None:
+                cursor = self._conn.execute("SELECT id FROM questions ORDER BY id")
+            else:
+                cursor = self._conn.execute(
+                    "SELECT id FROM questions WHERE set_name = ? ORDER BY position", (self.set_name,)
+                )
+            self._ids = array("q", (row[0] for row in cursor))
+        return self._ids
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def get(self, index: int) -> Question | None:
+        row = self._conn.execute(
+            "SELECT question, correct, a, b, c, d FROM questions WHERE id = ?", (self._index()[index],)
+        ).fetchone()
+        if row is None:
+            # Rekord usunięty po zbudowaniu indeksu
+            return None
+        return make_question(row[0], row[1], row[2:])
+
+    def __iter__(self):
+        if self.set_name is None:
+            cursor = self._conn.execute("SELECT question, correct, a, b, c, d FROM questions ORDER BY id")
+        else:
+            cursor = self._conn.execute(
+                "SELECT question, correct, a, b, c, d FROM questions WHERE set_name = ? ORDER BY position",
+                (self.set_name,),
+            )
+        for row in cursor:
+            yield make_question(row[0], row[1], row[2:])
+
+    def close(self):
+        self._conn.close()
+
+
+SOURCE_TYPES = {
+    ".txt": TextQuestionSource,
+    ".json": JsonQuestionSource,
+    ".jsonl": JsonLinesQuestionSource,
+    ".csv": CsvQuestionSource,
+    ".sqlite3": SqliteQuestionSource,
+    ".db": SqliteQuestionSource,
+}
+
+
+def open_source(path: str, **kwargs) -> QuestionSource:
+    """Otwiera źródło pytań na podstawie rozszerzenia pliku."""
+    extension = os.path.splitext(path)[1].lower()
+    source_type = SOURCE_TYPES.get(extension)
+    if source_type is None:
+        raise ValueError(f"Nieobsługiwany format pliku pytań: {path}")
+    return source_type(path, **kwargs)
+
+
+# --- Eksport (zapis strumieniowy) ---
+
+def _write_text(f, questions) -> int:
+    count = 0
+    for count, q in enumerate(questions, start=1):
+        options = ", ".join(f"{letter} = {answer}" for letter, answer in zip(ANSWER_LETTERS, q.answers))
+        f.write(f"{count:02d}. {q.question}\n")
+        f.write(f"prawidłowa odpowiedz = {q.correct}\n")
+        f.write(f"odpowiedz ABCD = {options}\n")
+    return count
+
+
+def _write_jsonl(f, questions) -> int:
+    count = 0
+    for count, q in enumerate(questions, start=1):
+        f.write(json.dumps(q.as_dict(), ensure_ascii=False))
+        f.write("\n")
+    return count
+
+
+def _write_json(f, questions) -> int:
+    count = 0
+    f.write("[\n")
+    for count, q in enumerate(questions, start=1):
+        if count > 1:
+            f.write(",\n")
+        f.write(json.dumps(q.as_dict(), ensure_ascii=False))
+    f.write("\n]\n")
+    return count
+
+
+def _write_csv(f, questions) -> int:
+    writer = csv.writer(f)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for count, q in enumerate(questions, start=1):
+        writer.writerow([q.question, q.correct, *q.answers])
+    return count
+
+
+def write_sqlite(path: str, questions, set_name: str = "") -> int:
+    """Dopisuje pytania do bazy SQLite (paczkami po SQLITE_BATCH_SIZE)."""
+    import sqlite3
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                set_name TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                question TEXT NOT NULL,
+                correct TEXT NOT NULL,
+                a TEXT NOT NULL, b TEXT NOT NULL, c TEXT NOT NULL, d TEXT NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_set_position ON questions (set_name, position);
+        """)
+        (position,) = conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM questions WHERE set_name = ?", (set_name,)
+        ).fetchone()
+        count = 0
+        rows = ((set_name, position + i, q.question, q.correct, *q.answers) for i, q in enumerate(questions))
+        while True:
+            batch = list(itertools.islice(rows, SQLITE_BATCH_SIZE))
+            if not batch:
+                break
+            with conn:
+                conn.executemany(
+                    "INSERT INTO questions (set_name, position, question, correct, a, b, c, d) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+            count += len(batch)
+        return count
+    finally:
+        conn.close()
+
+
+_WRITERS = {
+    ".txt": _write_text,
+    ".json": _write_json,
+    ".jsonl": _write_jsonl,
+    ".csv": _write_csv,
+}
+
+
+def write_questions(path: str, questions, set_name: str = "") -> int:
+    """
+    Zapisuje pytania (dowolny iterowalny strumień) w formacie wg rozszerzenia.
+    Zwraca liczbę zapisanych pytań.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if SOURCE_TYPES.get(extension) is SqliteQuestionSource:
+        return write_sqlite(path, questions, set_name)
+    writer = _WRITERS.get(extension)
+    if writer is None:
+        raise ValueError(f"Nieobsługiwany format pliku pytań: {path}")
+    newline = "" if extension == ".csv" else None
+    with open(path, "w", encoding="utf-8", newline=newline) as f:
+        return writer(f, questions)
+
+
+def convert(src_path: str, dst_path: str, set_name: str | None = None) -> int:
+    """
+    Konwertuje bank pytań między formatami bez wczytywania go w całości
+    (np. assets/01.txt -> bank.sqlite3). Do SQLite zestaw dostaje nazwę
+    `set_name` lub nazwę pliku źródłowego.
+    """
+    if set_name is None:
+        set_name = os.path.splitext(os.path.basename(src_path))[0]
+    with open_source(src_path) as source:
+        return write_questions(dst_path, iter(source), set_name)
+
+
+# --- Pomiar pamięci banku pytań ---
+
+def _parse_text_as_dicts(content: str) -> list:
+    # Dawny układ rekordu (słownik + lista, bez internowania) - punkt odniesienia
+    records = []
+    for block in _BLOCK_SPLIT.split(content.replace("\r\n", "\n")):
+        match = _BLOCK.match(block.strip())
+        if match:
+            correct = match.group(2).strip()
+            answers = split_abcd(match.group(3).strip(), correct)
+            records.append({"question": match.group(1).strip(), "correct": correct, "answers": answers})
+    return records
+
+
+def measure_bank_memory(paths) -> dict:
+    """
+    Mierzy (tracemalloc) pamięć zajmowaną przez wszystkie zestawy wczytane naraz,
+    jak w trybie serwera: dawne słowniki vs rekordy Question z internowaniem.
+    """
+    import tracemalloc
+
+    contents = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            contents.append(f.read())
+
+    def traced(build):
+        tracemalloc.start()
+        try:
+            bank = build()
+            used, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return bank, used
+
+    legacy, legacy_bytes = traced(lambda: [q for c in contents for q in _parse_text_as_dicts(c)])
+    legacy_count = len(legacy)
+    del legacy
+    compact, compact_bytes = traced(lambda: [q for c in contents for q in parse_text_questions(c)])
+
+    total_answers = sum(len(q.answers) for q in compact)
+    distinct_answers = len({id(a) for q in compact for a in q.answers})
+    return {
+        "questions": len(compact),
+        "legacy_count": legacy_count,
+        "legacy_bytes_per_question": legacy_bytes / max(legacy_count, 1),
+        "compact_bytes_per_question": compact_bytes / max(len(compact), 1),
+        "answer_strings": total_answers,
+        "distinct_answer_strings": distinct_answers,
+    }
+
+
+if __name__ == "__main__":
+    # Import / eksport wielu plików: python question_sources.py assets/*.txt bank.sqlite3
+    # Pomiar pamięci:                python question_sources.py --memory assets/*.txt
+    if len(sys.argv) >= 3 and sys.argv[1] == "--memory":
+        report = measure_bank_memory(sys.argv[2:])
+        saved = 1 - report["compact_bytes_per_question"] / report["legacy_bytes_per_question"]
+        print(f"Pytań: {report['questions']}")
+        print(f"Słowniki:       {report['legacy_bytes_per_question']:.0f} B/pytanie")
+        print(f"Question+intern: {report['compact_bytes_per_question']:.0f} B/pytanie ({saved:.0%} mniej)")
+        print(f"Teksty odpowiedzi: {report['distinct_answer_strings']} unikalnych z {report['answer_strings']}")
+        sys.exit(0)
+    if len(sys.argv) < 3:
+        print("Użycie: python question_sources.py ŹRÓDŁO [ŹRÓDŁO ...] CEL")
+        print("        python question_sources.py --memory PLIK [PLIK ...]")
+        sys.exit(1)
+    *sources, target = sys.argv[1:]
+    if SOURCE_TYPES.get(os.path.splitext(target)[1].lower()) is SqliteQuestionSource:
+        # Do bazy każdy plik trafia jako osobny zestaw
+        for src in sources:
+            print(f"{src} -> {target}: {convert(src, target)} pytań")
+    else:
+        opened = [open_source(src) for src in sources]
+        try:
+            count = write_questions(target, itertools.chain.from_iterable(opened))
+        finally:
+            for source in opened:
+                source.close()
+        print(f"{len(sources)} plików -> {target}: {count} pytań")
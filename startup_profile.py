@@ -0,0 +1,59 @@
+import os
+import time
+
+# --- STAŁE: Profil startu ---
+STARTUP_PROFILE_ENV = "AWANTURA_STARTUP_PROFILE"  # "1" - profil każdej sesji (domyślnie tylko pierwszej)
+
+# Początek pomiaru: import tego modułu w pierwszej linii main.py
+PROCESS_STARTED = time.perf_counter()
+
+
+class StartupProfile:
+    """
+    Etapy startu (nazwa, czas trwania) mierzone od `started`. Chwilę wysłania
+    pierwszej klatki z menu oznacza interactive() - to jest czas do interakcji.
+    Szczegóły importów: python -X importtime main.py.
+    """
+
+    def __init__(self, started: float | None = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = []
+        self.interactive_ms = None
+        self._last = self.started
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def interactive(self, name: str = "pierwsza klatka (menu)"):
+        self.mark(name)
+        self.interactive_ms = (self._last - self.started) * 1000
+
+    def report(self, platform: str) -> str:
+        lines = [f"Start ({platform}): menu interaktywne po {self.interactive_ms or 0:.1f} ms, "
+                 f"całość {(self._last - self.started) * 1000:.1f} ms"]
+        interactive = True
+        for name, ms in self.phases:
+            # Etapy po pierwszej klatce nie wliczają się do czasu do interakcji
+            lines.append(f"    {name if interactive else '(po) ' + name:32s} {ms:8.1f} ms")
+            interactive = interactive and not name.startswith("pierwsza klatka")
+        return "\n".join(lines)
+
+
+# Profil procesu: importy, a potem pierwsza sesja (jej czas do interakcji liczy się od startu procesu)
+PROCESS_PROFILE = StartupProfile(PROCESS_STARTED)
+_first_session = True
+
+
+def session_profile() -> tuple:
+    """
+    Profil nowej sesji main(page). Zwraca (profil, czy_drukować): pierwsza sesja
+    kontynuuje profil procesu i jest drukowana zawsze, kolejne (np. web)
+    tylko przy ustawionym AWANTURA_STARTUP_PROFILE.
+    """
+    global _first_session
+    if _first_session:
+        _first_session = False
+        return PROCESS_PROFILE, True
+    return StartupProfile(), bool(os.getenv(STARTUP_PROFILE_ENV))
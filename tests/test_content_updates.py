@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from content_updates import ContentCache, ContentUpdater, serve_local
+from manifest import build_manifest
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+class ContentUpdaterTest(unittest.TestCase):
+    """Aktualizacje zestawów względem lokalnego serwera treści (serve_local)."""
+
+    def setUp(self):
+        self.server_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.server_dir, True)
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        for name in os.listdir(ASSETS_DIR):
+            if name.endswith(".txt"):
+                shutil.copy(os.path.join(ASSETS_DIR, name), self.server_dir)
+
+        # Manifest "z APK" - zestawy takie jak na serwerze przed zmianami
+        self.bundled = {entry["set"]: entry for entry in build_manifest(self.server_dir)["sets"]}
+        self.server, url = serve_local(self.server_dir)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.cache = ContentCache(self.cache_dir)
+        self.updater = ContentUpdater(url, self.cache)
+
+    def edit_server_set(self, set_name: str, suffix: str = "\n") -> str:
+        path = os.path.join(self.server_dir, f"{set_name}.txt")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(suffix)
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return f.read()
+
+    def test_unchanged_sets_are_not_downloaded(self):
+        report = self.updater.update(self.bundled, force=True)
+        self.assertEqual(report["changed"], [])
+        self.assertEqual(report["bytes"], 0)
+        self.assertEqual(self.cache.entries(), {})
+
+    def test_changed_set_is_downloaded(self):
+        content = self.edit_server_set("07")
+
+        report = self.updater.update(self.bundled, force=True)
+
+        self.assertEqual(report["changed"], ["07"])
+        self.assertEqual(report["failed"], [])
+        self.assertEqual(self.cache.read_text("07.txt"), content)
+        self.assertNotEqual(self.cache.entries()["07"]["sha256"], self.bundled["07"]["sha256"])
+        # Drugie sprawdzenie nic już nie pobiera
+        self.assertEqual(self.updater.update(self.bundled, force=True)["changed"], [])
+
+    def test_corrupted_download_is_rejected(self):
+        self.edit_server_set("05")
+        plan = self.updater.plan
+
+        def plan_then_corrupt(server_sets, bundled):
+            # Plik zmienia się po wysłaniu manifestu - sha256 pobranych danych się nie zgadza
+            to_download, to_drop = plan(server_sets, bundled)
+            for entry in to_download:
+                self.edit_server_set(entry["set"], "\nśmieci")
+            return to_download, to_drop
+
+        self.updater.plan = plan_then_corrupt
+        report = self.updater.update(self.bundled, force=True)
+
+        self.assertEqual(report["changed"], [])
+        self.assertEqual(report["failed"], ["05"])
+        self.assertIsNone(self.cache.read_text("05.txt"))
+        self.assertNotIn("05", self.cache.entries())
+
+    def test_rollback_to_bundled_version_drops_cached_set(self):
+        self.edit_server_set("07")
+        self.updater.update(self.bundled, force=True)
+        self.assertIn("07", self.cache.entries())
+
+        shutil.copy(os.path.join(ASSETS_DIR, "07.txt"), self.server_dir)
+        report = self.updater.update(self.bundled, force=True)
+
+        self.assertEqual(report["changed"], ["07"])
+        self.assertNotIn("07", self.cache.entries())
+        self.assertIsNone(self.cache.read_text("07.txt"))
+
+    def test_manifest_entries_outside_bundled_sets_are_ignored(self):
+        # Serwer podaje ścieżkę poza pamięcią albo zestaw spoza 01-50 - nic nie jest pobierane
+        server_sets = {
+            "07": dict(self.bundled["07"], file="../07.txt", sha256="0" * 64),
+            "51": {"set": "51", "file": "51.txt", "sha256": "1" * 64, "questions": 1},
+            "../x": {"set": "../x", "file": "../x.txt", "sha256": "2" * 64, "questions": 1},
+        }
+
+        self.assertEqual(self.updater.plan(server_sets, self.bundled), ([], []))
+        with self.assertRaises(ValueError):
+            self.cache.store(server_sets["07"], b"")
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from leaderboard import HttpLeaderboardBackend, LeaderboardService, LeaderboardStore, serve_local
+
+
+class FailingBackend:
+    """Backend, którego każda wysyłka kończy się błędem (np. brak sieci)."""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def submit_batch(self, entries: list):
+        self.attempts += 1
+        raise OSError("brak połączenia")
+
+
+class LeaderboardStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = LeaderboardStore()
+        self.addCleanup(self.store.close)
+        self.store.add_scores([
+            ("Ala", "01", 5000),
+            ("Ola", "01", 12000),
+            ("Ela", "01", 5000),
+            ("Ala", "02", 20000),
+            ("Ola", "02", 300),
+        ])
+
+    def test_top_per_set_and_global(self):
+        self.assertEqual(self.store.top("01", 2), [("Ola", "01", 12000), ("Ala", "01", 5000)])
+        self.assertEqual([row[2] for row in self.store.top(None)], [20000, 12000, 5000, 5000, 300])
+
+    def test_rank_counts_higher_scores(self):
+        self.assertEqual(self.store.rank(13000, "01"), 1)
+        self.assertEqual(self.store.rank(12000, "01"), 1)
+        # Remis z dwoma wynikami 5000 - to samo miejsce za jednym wyższym
+        self.assertEqual(self.store.rank(5000, "01"), 2)
+        self.assertEqual(self.store.rank(100, "01"), 4)
+        self.assertEqual(self.store.rank(5000), 3)
+
+    def test_player_rank_and_best_scores(self):
+        self.assertEqual(self.store.player_rank("Ala", "01"), 2)
+        self.assertIsNone(self.store.player_rank("Ula", "01"))
+        self.assertEqual(self.store.best_scores(), {"01": 12000, "02": 20000})
+
+
+class LeaderboardServiceTest(unittest.TestCase):
+    """Wysyłka wyników paczkami do lokalnego serwera rankingu (serve_local)."""
+
+    def setUp(self):
+        self.server_store = LeaderboardStore()
+        self.server, self.url = serve_local(store=self.server_store)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.store = LeaderboardStore()
+        self.addCleanup(self.store.close)
+
+    def test_flush_sends_pending_scores_in_batches(self):
+        service = LeaderboardService(self.store, HttpLeaderboardBackend(self.url), batch_size=2)
+        for score in (100, 200, 300, 400, 500):
+            service.record("03", score)
+        self.assertEqual(len(self.store.pending(10)), 5)
+
+        self.assertEqual(service.flush(), 5)
+
+        self.assertEqual(self.store.pending(10), [])
+        self.assertEqual([row[2] for row in self.server_store.top("03")], [500, 400, 300, 200, 100])
+        self.assertEqual(service.flush(), 0)
+
+    def test_failed_submission_keeps_scores_pending(self):
+        backend = FailingBackend()
+        service = LeaderboardService(self.store, backend, max_retries=3, retry_delay=0)
+        service.record("03", 700)
+        service.record("03", 800)
+
+        self.assertEqual(service.flush(), 0)
+
+        self.assertEqual(backend.attempts, 3)
+        self.assertEqual(len(self.store.pending(10)), 2)
+
+        # Następny flush (np. po odzyskaniu sieci) wysyła zaległe wyniki
+        service.backend = HttpLeaderboardBackend(self.url)
+        self.assertEqual(service.flush(), 2)
+        self.assertEqual(self.store.pending(10), [])
+        self.assertEqual(self.server_store.rank(750, "03"), 2)
+
+    def test_unreachable_server_keeps_scores_pending(self):
+        self.server.shutdown()
+        self.server.server_close()
+        service = LeaderboardService(self.store, HttpLeaderboardBackend(self.url, timeout=1.0),
+                                     max_retries=2, retry_delay=0)
+        service.record("04", 900)
+
+        self.assertEqual(service.flush(), 0)
+        self.assertEqual(len(self.store.pending(10)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
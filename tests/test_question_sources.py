@@ -0,0 +1,78 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from question_sources import QuestionSource, SourceQuestions, convert, make_question, open_source, write_questions
+
+QUESTIONS = [
+    make_question("Jaka jest stolica Wietnamu?", "Hanoi", ["Bangkok", "Hanoi", "Manila", "Dżakarta"]),
+    # Odpowiedź z ", B = " w środku - format .txt musi wybrać właściwy podział opcji
+    make_question("Który zapis jest poprawny?", "x, B = 2", ["x, B = 2", "y", "z", "x = B"]),
+    make_question("Kto napisał \"Lalkę\"?", "Bolesław Prus", ["Bolesław Prus", "Henryk Sienkiewicz",
+                                                          "Eliza Orzeszkowa", "Stefan Żeromski"]),
+]
+# Pole z nową linią i cudzysłowem - rekord CSV zajmuje kilka linii pliku
+MULTILINE = make_question("Dokończ cytat:\n\"Litwo! Ojczyzno moja...\"", "ty jesteś jak zdrowie",
+                          ["ty jesteś jak zdrowie", "ty jesteś jak słońce", "kraj lat dziecinnych", "Soplicowo"])
+
+
+class QuestionSourceRoundTripTest(unittest.TestCase):
+    """Zapis write_questions i odczyt open_source dają te same rekordy w każdym formacie."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+
+    def round_trip(self, filename: str, questions: list) -> list:
+        path = os.path.join(self.dir, filename)
+        self.assertEqual(write_questions(path, iter(questions), set_name="01"), len(questions))
+        with open_source(path) as source:
+            self.assertEqual(len(source), len(questions))
+            self.assertEqual([source.get(i) for i in range(len(source))], questions)
+            self.assertEqual(source.get(-1), questions[-1])
+            return list(source)
+
+    def test_all_formats(self):
+        for extension in (".txt", ".json", ".jsonl", ".csv", ".sqlite3"):
+            with self.subTest(extension=extension):
+                self.assertEqual(self.round_trip(f"bank{extension}", QUESTIONS), QUESTIONS)
+
+    def test_multiline_fields(self):
+        questions = [QUESTIONS[0], MULTILINE, QUESTIONS[2]]
+        for extension in (".csv", ".json", ".jsonl", ".sqlite3"):
+            with self.subTest(extension=extension):
+                self.assertEqual(self.round_trip(f"multiline{extension}", questions), questions)
+
+    def test_convert_between_formats(self):
+        src = os.path.join(self.dir, "01.txt")
+        write_questions(src, QUESTIONS)
+        previous = src
+        for extension in (".csv", ".jsonl", ".sqlite3", ".json"):
+            path = os.path.join(self.dir, f"bank{extension}")
+            self.assertEqual(convert(previous, path), len(QUESTIONS))
+            with open_source(path) as source:
+                self.assertEqual(list(source), QUESTIONS)
+            previous = path
+
+    def test_sqlite_gaps_in_ids(self):
+        path = os.path.join(self.dir, "bank.sqlite3")
+        write_questions(path, QUESTIONS)
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute("DELETE FROM questions WHERE id = 1")
+        conn.close()
+
+        questions = SourceQuestions(open_source(path), path)
+        self.addCleanup(questions.source.close)
+        self.assertEqual(len(questions), 2)
+        self.assertEqual(list(questions), QUESTIONS[1:])
+
+    def test_source_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            QuestionSource()
+
+
+if __name__ == "__main__":
+    unittest.main()
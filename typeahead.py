@@ -0,0 +1,88 @@
+import threading
+
+# --- STAŁE: Podpowiedzi przy wpisywaniu ---
+TYPEAHEAD_MAX_SUGGESTIONS = 5
+TYPEAHEAD_MIN_PREFIX = 2  # podpowiedzi dopiero od 2 znaków
+TYPEAHEAD_DEBOUNCE = 0.25  # sekundy ciszy po ostatnim znaku przed odświeżeniem podpowiedzi
+
+_DIACRITICS = str.maketrans({
+    'ó': 'o', 'ł': 'l', 'ż': 'z', 'ź': 'z', 'ć': 'c',
+    'ń': 'n', 'ś': 's', 'ą': 'a', 'ę': 'e', 'ü': 'u',
+})
+
+
+def fold_text(text: str) -> str:
+    """Małe litery bez polskich znaków, pojedyncze spacje ("Łódź " -> "lodz")."""
+    return " ".join(str(text).lower().translate(_DIACRITICS).split())
+
+
+class AnswerTrie:
+    """
+    Drzewo prefiksowe po znormalizowanych odpowiedziach.
+
+    Każdy węzeł trzyma gotową listę (maks. TYPEAHEAD_MAX_SUGGESTIONS)
+    podpowiedzi, więc zapytanie to tylko przejście po znakach prefiksu.
+    Odpowiedź jest dostępna od początku każdego słowa ("slow" -> "Juliusz Słowacki"),
+    ale dopasowania od początku całej odpowiedzi mają pierwszeństwo.
+    """
+
+    def __init__(self, answers=(), limit: int = TYPEAHEAD_MAX_SUGGESTIONS):
+        self.limit = limit
+        self._root = ({}, [])
+        self.size = 0
+        self.add_all(answers)
+
+    def add_all(self, answers):
+        unique = sorted({a.strip() for a in answers if a and a.strip()}, key=lambda a: (len(a), a))
+        folded = [(answer, fold_text(answer)) for answer in unique]
+        # Najpierw całe odpowiedzi, potem dopasowania od kolejnych słów
+        for answer, key in folded:
+            self._insert(key, answer)
+        for answer, key in folded:
+            for i in range(1, len(key)):
+                if key[i - 1] == " ":
+                    self._insert(key[i:], answer)
+        self.size += len(unique)
+
+    def _insert(self, key: str, answer: str):
+        node = self._root
+        for char in key:
+            children = node[0]
+            node = children.get(char)
+            if node is None:
+                node = children[char] = ({}, [])
+            suggestions = node[1]
+            if len(suggestions) < self.limit and answer not in suggestions:
+                suggestions.append(answer)
+
+    def suggest(self, prefix: str) -> list:
+        key = fold_text(prefix)
+        if len(key) < TYPEAHEAD_MIN_PREFIX:
+            return []
+        node = self._root
+        for char in key:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return list(node[1])
+
+
+_trie = None
+_trie_lock = threading.Lock()
+
+
+def get_answer_trie(load_questions) -> AnswerTrie:
+    """
+    Wspólne drzewo dla wszystkich sesji, budowane raz przy pierwszym użyciu.
+    `load_questions` zwraca listę pytań całego banku (rekordy Question).
+    """
+    global _trie
+    with _trie_lock:
+        if _trie is None:
+            answers = []
+            for q in load_questions():
+                answers.append(q.correct)
+                answers.extend(q.answers)
+            _trie = AnswerTrie(answers)
+            print(f"Podpowiedzi: zbudowano drzewo z {_trie.size} odpowiedzi.")
+        return _trie